@@ -0,0 +1 @@
+"""Offline benchmarks for HN Digest hot paths (run with `python -m benchmarks.run`)."""
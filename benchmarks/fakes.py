@@ -0,0 +1,230 @@
+"""
+Local stand-ins for the HN Firebase API and Gemini, served by uvicorn in a thread
+"""
+import asyncio
+import json
+import random
+import re
+import socket
+import threading
+import time
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import HTMLResponse, JSONResponse
+
+
+def create_fake_hn(
+    item_count: int = 500,
+    latency: float = 0.0,
+    error_rate: float = 0.0,
+    seed: int = 42,
+    comments: int = 0,
+) -> FastAPI:
+    """Fake `/v0` HN API with `item_count` stories plus an article page per story.
+
+    `latency` seconds are added to every response and a random `error_rate`
+    share of item requests fail with 503. With `comments`, each story gets that
+    many top-level comments, and every comment three replies, without end.
+    """
+    app = FastAPI()
+    rng = random.Random(seed)
+    base_id = 40_000_000
+    now = int(time.time())
+    items = {
+        base_id + i: {
+            "id": base_id + i,
+            "type": "story",
+            "by": f"user{i % 97}",
+            "time": now - rng.randint(600, 36 * 3600),
+            "title": f"Story {i}: {rng.choice(['Rust', 'LLMs', 'SQLite', 'Kernels', 'Startups'])}",
+            "score": rng.randint(1, 1500),
+            "descendants": rng.randint(0, 800),
+            "kids": [],
+        }
+        for i in range(item_count)
+    }
+    ranked = sorted(items, key=lambda sid: items[sid]["score"], reverse=True)
+    next_comment = [50_000_000]
+
+    def _add_comments(parent: int, count: int):
+        # Comment trees are generated lazily, one level per fetched parent
+        kids = list(range(next_comment[0], next_comment[0] + count))
+        next_comment[0] += count
+        for n, kid in enumerate(kids):
+            items[kid] = {
+                "id": kid, "type": "comment", "by": f"user{kid % 89}", "parent": parent,
+                "time": now, "text": f"<p>Comment {n} on {parent} &amp; its <i>thread</i>.",
+            }
+        items[parent]["kids"] = kids
+
+    if comments:
+        for i in range(item_count):
+            _add_comments(base_id + i, comments)
+    app.state.requests = 0
+
+    async def _delay():
+        app.state.requests += 1
+        if latency:
+            await asyncio.sleep(latency)
+
+    @app.get("/v0/{feed}stories.json")
+    async def feed(feed: str):
+        await _delay()
+        ids = ranked if feed in ("top", "best") else ranked[::-1]
+        return ids[:500]
+
+    @app.get("/v0/updates.json")
+    async def updates():
+        await _delay()
+        return {"items": rng.sample(ranked[:100], k=min(10, len(ranked))), "profiles": []}
+
+    @app.get("/v0/item/{item_id}.json")
+    async def item(item_id: int, request: Request):
+        await _delay()
+        if error_rate and rng.random() < error_rate:
+            return JSONResponse({"error": "injected"}, status_code=503)
+        data = items.get(item_id)
+        if data is None:
+            return None
+        if data["type"] == "comment":
+            if "kids" not in data:
+                _add_comments(item_id, 3)
+            return data
+        return {**data, "url": f"{request.base_url}articles/{item_id}"}
+
+    @app.get("/articles/{item_id}", response_class=HTMLResponse)
+    async def article(item_id: int):
+        await _delay()
+        body = " ".join(f"Paragraph {n} about story {item_id}." for n in range(200))
+        return (
+            f"<html><head><title>{item_id}</title></head>"
+            f"<body><nav>menu</nav><article><p>{body}</p></article></body></html>"
+        )
+
+    return app
+
+
+def create_fake_gemini(latency: float = 0.0, truncate_rate: float = 0.0, seed: int = 42) -> FastAPI:
+    """Fake generateContent endpoint answering story shards and intro prompts.
+
+    A random `truncate_rate` share of shard responses is cut off mid-JSON, the
+    way a response hitting maxOutputTokens is.
+    """
+    app = FastAPI()
+    app.state.requests = 0
+    rng = random.Random(seed)
+
+    @app.post("/v1beta/models/{model}")
+    async def generate(model: str, request: Request):
+        app.state.requests += 1
+        if latency:
+            await asyncio.sleep(latency)
+        prompt = (await request.json())["contents"][0]["parts"][0]["text"]
+        count = len(re.findall(r"^### ", prompt, re.M))
+        if count:
+            text = json.dumps({
+                "stories": [
+                    {
+                        "index": i + 1,
+                        "summary_zh": f"这是第 {i + 1} 篇文章的中文摘要，用于基准测试。",
+                        "category": "tech",
+                        "importance": (i % 5) + 1,
+                    }
+                    for i in range(count)
+                ]
+            }, ensure_ascii=False)
+            if truncate_rate and rng.random() < truncate_rate:
+                text = text[: len(text) // 2]
+        else:
+            text = "今天的 Hacker News 热门话题涵盖编程语言、数据库与人工智能。"
+        return {
+            "candidates": [{"content": {"parts": [{"text": text}]}}],
+            "usageMetadata": {
+                "promptTokenCount": len(prompt) // 2,
+                "candidatesTokenCount": len(text) // 2,
+                "totalTokenCount": (len(prompt) + len(text)) // 2,
+            },
+        }
+
+    return app
+
+
+def create_fake_telegram(
+    latency: float = 0.0, chat_interval: float = 1.0, retry_after: int = 1
+) -> FastAPI:
+    """Fake Bot API `sendMessage` that enforces the per-chat rate and the length limit.
+
+    A chat sent to again within `chat_interval` seconds gets a 429 with
+    `retry_after`; chat ids starting with "blocked" get a 403. Accepted
+    messages are kept in `app.state.messages` as (chat_id, text) pairs.
+    """
+    app = FastAPI()
+    app.state.requests = 0
+    app.state.messages = []
+    last_sent: dict[str, float] = {}
+
+    @app.post("/bot{token}/sendMessage")
+    async def send_message(token: str, request: Request):
+        app.state.requests += 1
+        if latency:
+            await asyncio.sleep(latency)
+        body = await request.json()
+        chat_id, text = str(body["chat_id"]), body["text"]
+        if chat_id.startswith("blocked"):
+            return JSONResponse(
+                {"ok": False, "error_code": 403, "description": "Forbidden: bot was blocked"},
+                status_code=403,
+            )
+        if len(text.encode("utf-16-le")) // 2 > 4096:
+            return JSONResponse(
+                {"ok": False, "error_code": 400, "description": "Bad Request: message is too long"},
+                status_code=400,
+            )
+        now = time.monotonic()
+        if now - last_sent.get(chat_id, float("-inf")) < chat_interval:
+            return JSONResponse(
+                {
+                    "ok": False,
+                    "error_code": 429,
+                    "description": f"Too Many Requests: retry after {retry_after}",
+                    "parameters": {"retry_after": retry_after},
+                },
+                status_code=429,
+            )
+        last_sent[chat_id] = now
+        app.state.messages.append((chat_id, text))
+        return {"ok": True, "result": {"message_id": len(app.state.messages), "text": text}}
+
+    return app
+
+
+class LocalServer:
+    """Run an ASGI app on 127.0.0.1 in a background thread."""
+
+    def __init__(self, app, port: int = 0):
+        if port == 0:
+            with socket.socket() as sock:
+                sock.bind(("127.0.0.1", 0))
+                port = sock.getsockname()[1]
+        self.app = app
+        self.port = port
+        self.url = f"http://127.0.0.1:{port}"
+        config = uvicorn.Config(
+            app, host="127.0.0.1", port=port, log_level="warning", lifespan="off"
+        )
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    def __enter__(self) -> "LocalServer":
+        self._thread.start()
+        deadline = time.monotonic() + 10
+        while not self._server.started:
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"Server on port {self.port} did not start")
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc):
+        self._server.should_exit = True
+        self._thread.join(timeout=5)
@@ -0,0 +1,273 @@
+"""
+Benchmark runner - measure HN Digest hot paths against local fakes
+
+    python -m benchmarks.run                          # all scenarios, JSON on stdout
+    python -m benchmarks.run -s fetch -s api -o bench.json
+    python -m benchmarks.run --compare bench.json     # report change vs a previous run
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from .fakes import LocalServer, create_fake_gemini, create_fake_hn
+
+SCENARIOS = ("fetch", "generate", "storage", "api")
+
+
+def summarize(samples: list[float], **extra) -> dict:
+    """Latency statistics in milliseconds for a list of durations in seconds."""
+    ms = sorted(s * 1000 for s in samples)
+    p95 = ms[min(len(ms) - 1, int(round(0.95 * (len(ms) - 1))))]
+    return {
+        "runs": len(ms),
+        "min_ms": round(ms[0], 3),
+        "median_ms": round(statistics.median(ms), 3),
+        "p95_ms": round(p95, 3),
+        "mean_ms": round(statistics.fmean(ms), 3),
+        "max_ms": round(ms[-1], 3),
+        **extra,
+    }
+
+
+async def bench_fetch(items: int, repeat: int) -> dict:
+    """Cold fetch of `items` top stories through a fresh HNClient (no item cache)."""
+    from src.scraper import HNClient
+
+    samples, failed = [], 0
+    for _ in range(repeat):
+        async with HNClient() as client:
+            start = time.perf_counter()
+            result = await client.fetch_feed("top", items)
+            samples.append(time.perf_counter() - start)
+            failed += len(result.failed)
+    median = statistics.median(samples)
+    return summarize(samples, items=items, items_per_sec=round(items / median, 1), failed=failed)
+
+
+async def _reset_app(main):
+    """Drop every process-level cache and client so the next generation is cold."""
+    for name in ("_summarizer", "_hn_client", "_content_fetcher"):
+        client = getattr(main, name)
+        if client is not None:
+            await client.aclose()
+            setattr(main, name, None)
+    main.digest_cache.invalidate()
+    main._last_generated.clear()
+    shutil.rmtree(main.DATA_DIR, ignore_errors=True)
+
+
+async def bench_generate(repeat: int) -> dict:
+    """End-to-end generate_digest: cold (empty caches) and warm (caches populated)."""
+    from src import main
+
+    cold, warm = [], []
+    for _ in range(repeat):
+        await _reset_app(main)
+        start = time.perf_counter()
+        await main.generate_digest(force=True)
+        cold.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await main.generate_digest(force=True)
+        warm.append(time.perf_counter() - start)
+    await _reset_app(main)
+    return {"cold": summarize(cold), "warm": summarize(warm)}
+
+
+def bench_storage(repeat: int) -> dict:
+    """save_digest / load_digest round trips for a 10-story digest."""
+    from src import storage
+    from src.cache import digest_cache
+
+    digest = _sample_digest()
+    save, load = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        storage.save_digest(digest)
+        save.append(time.perf_counter() - start)
+
+        digest_cache.invalidate()
+        start = time.perf_counter()
+        storage.load_digest(digest.date)
+        load.append(time.perf_counter() - start)
+    return {"save": summarize(save), "load": summarize(load)}
+
+
+def _sample_digest():
+    from src.scraper import Story
+    from src.summarizer import DailyDigest, DigestedStory
+
+    stories = [
+        DigestedStory(
+            story=Story(
+                id=40_000_000 + i,
+                title=f"Benchmark story {i}",
+                url=f"https://example.com/{i}",
+                score=1000 - i,
+                by="bench",
+                time=datetime(2026, 1, 1, 12, 0),
+                descendants=i * 3,
+            ),
+            summary_zh="这是一段用于基准测试的中文摘要，长度与真实摘要相近。" * 3,
+            category="tech",
+            importance=(i % 5) + 1,
+        )
+        for i in range(10)
+    ]
+    return DailyDigest(date="2000-01-01", stories=stories, intro="基准测试开场白。" * 10)
+
+
+async def bench_api(requests: int, concurrency: int) -> dict:
+    """Requests/sec for the digest endpoints served by uvicorn."""
+    import httpx
+    from src import main
+
+    await main.generate_digest(force=True)
+    results = {}
+    with LocalServer(main.app) as server:
+        async with httpx.AsyncClient(base_url=server.url, timeout=30) as client:
+            etag = (await client.get("/digest")).headers["etag"]
+            cases = {
+                "digest_json": ("/digest", {}),
+                "digest_json_gzip": ("/digest", {"Accept-Encoding": "gzip"}),
+                "digest_json_304": ("/digest", {"If-None-Match": etag}),
+                "digest_markdown": ("/digest/markdown", {}),
+                "health": ("/health", {}),
+            }
+            for name, (path, headers) in cases.items():
+                results[name] = await _hammer(client, path, headers, requests, concurrency)
+    return results
+
+
+async def _hammer(client, path: str, headers: dict, requests: int, concurrency: int) -> dict:
+    samples: list[float] = []
+    remaining = iter(range(requests))
+
+    async def worker():
+        for _ in remaining:
+            start = time.perf_counter()
+            resp = await client.get(path, headers=headers)
+            samples.append(time.perf_counter() - start)
+            if resp.status_code >= 400:
+                raise RuntimeError(f"{path} returned {resp.status_code}")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return summarize(samples, requests_per_sec=round(requests / elapsed, 1))
+
+
+def compare(current: dict, baseline: dict) -> list[str]:
+    """Human-readable median deltas for every metric present in both runs."""
+    lines = []
+
+    def walk(cur, base, path):
+        for key, value in cur.items():
+            if key not in base:
+                continue
+            if isinstance(value, dict):
+                walk(value, base[key], f"{path}.{key}" if path else key)
+            elif key == "median_ms" and base[key]:
+                change = (value - base[key]) / base[key] * 100
+                lines.append(
+                    f"{path:<32} {base[key]:>10.2f} -> {value:>10.2f} ms  ({change:+.1f}%)"
+                )
+
+    walk(current["results"], baseline.get("results", {}), "")
+    return lines
+
+
+async def run(args) -> dict:
+    results = {}
+    if "fetch" in args.scenario:
+        results["fetch"] = await bench_fetch(args.items, args.repeat)
+    if "generate" in args.scenario:
+        results["generate"] = await bench_generate(args.repeat)
+    if "storage" in args.scenario:
+        results["storage"] = bench_storage(args.repeat * 10)
+    if "api" in args.scenario:
+        results["api"] = await bench_api(args.requests, args.concurrency)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HN Digest offline benchmarks")
+    parser.add_argument("-s", "--scenario", action="append", choices=SCENARIOS)
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="Runs per scenario")
+    parser.add_argument("--items", type=int, default=100, help="Stories per fetch benchmark")
+    parser.add_argument("--hn-items", type=int, default=500, help="Stories served by fake HN")
+    parser.add_argument("--hn-latency", type=float, default=0.005, help="Fake HN latency (s)")
+    parser.add_argument("--hn-error-rate", type=float, default=0.0, help="Fake HN 503 rate")
+    parser.add_argument(
+        "--hn-comments", type=int, default=0, help="Top-level comments per fake HN story"
+    )
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Fake Gemini latency (s)")
+    parser.add_argument(
+        "--llm-truncate-rate", type=float, default=0.0, help="Fake Gemini truncated-JSON rate"
+    )
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per API case")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent API clients")
+    parser.add_argument("-o", "--output", help="Write results JSON here (default: stdout)")
+    parser.add_argument("--compare", help="Previous results JSON to compare medians against")
+    args = parser.parse_args()
+    args.scenario = args.scenario or list(SCENARIOS)
+
+    data_dir = tempfile.mkdtemp(prefix="hn-digest-bench-")
+    hn_app = create_fake_hn(
+        args.hn_items, args.hn_latency, args.hn_error_rate, comments=args.hn_comments
+    )
+    gemini_app = create_fake_gemini(args.llm_latency, args.llm_truncate_rate)
+    with LocalServer(hn_app) as hn, LocalServer(gemini_app) as gemini:
+        # Must be set before anything under src/ is imported
+        os.environ.update({
+            "HN_API_BASE": f"{hn.url}/v0",
+            "GEMINI_API_URL": f"{gemini.url}/v1beta/models/gemini-2.0-flash:generateContent",
+            "GOOGLE_API_KEY": "benchmark",
+            "HN_DIGEST_DATA_DIR": data_dir,
+            "HN_DIGEST_REFRESH_DEBOUNCE": "0",
+            "HN_POLL_INTERVAL": "0",
+        })
+        try:
+            # Keep the app's progress logging out of the JSON on stdout
+            with contextlib.redirect_stdout(sys.stderr):
+                results = asyncio.run(run(args))
+        finally:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+        report = {
+            "meta": {
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "args": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+                "fake_hn_requests": hn_app.state.requests,
+                "fake_gemini_requests": gemini_app.state.requests,
+            },
+            "results": results,
+        }
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        for line in compare(report, baseline):
+            print(line, file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
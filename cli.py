@@ -16,21 +16,46 @@ load_dotenv()
 
 async def main():
     parser = argparse.ArgumentParser(description="HN Digest CLI")
-    parser.add_argument("command", choices=["fetch", "digest", "test"], help="Command to run")
+    parser.add_argument(
+        "command",
+        choices=["fetch", "digest", "test", "migrate", "search", "export", "profile", "send"],
+        help="Command to run",
+    )
+    parser.add_argument("query", nargs="?", help="search: query text")
     parser.add_argument("-n", "--num", type=int, default=10, help="Number of stories")
     parser.add_argument("-f", "--format", choices=["json", "md", "telegram"], default="md")
-    args = parser.parse_args()
+    parser.add_argument("--json-dir", help="migrate: directory of JSON digests to import")
+    parser.add_argument("--category", help="search: only this category")
+    parser.add_argument("--from", dest="date_from", help="search: earliest date (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="date_to", help="search: latest date (YYYY-MM-DD)")
+    parser.add_argument("--page", type=int, default=1, help="search: result page")
+    parser.add_argument("--reindex", action="store_true", help="search: rebuild the index first")
+    parser.add_argument("--out", help="export: output directory (default: docs/data)")
+    parser.add_argument("--force", action="store_true", help="export: rewrite every file")
+    parser.add_argument("--cprofile", action="store_true", help="profile: also run under cProfile")
+    parser.add_argument("--trace", help="profile: analyze an existing trace file instead")
+    parser.add_argument("--feeds", help='fetch/digest: feeds to draw on, e.g. "top:30,best:10"')
+    parser.add_argument(
+        "--rank", choices=["score", "velocity", "comments"],
+        help="digest/profile: how stories are picked (default: HN_DIGEST_RANK or score)",
+    )
+    args = parser.parse_intermixed_args()
     
     if args.command == "fetch":
-        from src.scraper import fetch_top_stories
-        stories = await fetch_top_stories(args.num)
+        from src.scraper import fetch_feeds, parse_feeds
+        stories = await fetch_feeds(parse_feeds(args.feeds or f"top:{args.num}"))
         for s in stories:
-            print(f"[{s.score:4d}] {s.title}")
+            feeds = " ".join(f"{feed}#{rank}" for feed, rank in s.feeds.items())
+            print(f"[{s.score:4d}] {s.title}  ({feeds})")
             print(f"       {s.url or s.hn_url}")
             print()
     
     elif args.command == "digest":
-        from src.scraper import fetch_top_stories
+        from datetime import date
+        from src.dedup import dedupe_stories, recent_stories
+        from src.scraper import fetch_feeds, parse_feeds
+        from src.scores import ScoreStore, ranking_key
+        from src.storage import DATA_DIR
         from src.summarizer import (
             create_summarizer, 
             format_digest_markdown,
@@ -39,12 +64,26 @@ async def main():
         import json
         
         print("📡 Fetching stories...", file=sys.stderr)
-        stories = await fetch_top_stories(30)
+        stories = await fetch_feeds(parse_feeds(args.feeds or "top:30"))
         print(f"✅ Got {len(stories)} stories", file=sys.stderr)
         
-        print("🤖 Generating digest...", file=sys.stderr)
+        scores = ScoreStore(DATA_DIR / "scores")
+        scores.append(stories)
+        if os.getenv("HN_DEDUP", "1") == "1":
+            days = int(os.getenv("HN_DEDUP_DAYS", "2"))
+            deduped = dedupe_stories(stories, recent_stories(date.today().isoformat(), days))
+            stories = deduped.stories
+            print(
+                f"🧹 {len(stories)} after de-duplication ({len(deduped.seen)} already digested)",
+                file=sys.stderr,
+            )
+        rank = args.rank or os.getenv("HN_DIGEST_RANK", "score")
+        
+        print(f"🤖 Generating digest (ranked by {rank})...", file=sys.stderr)
         summarizer = create_summarizer()
-        digest = summarizer.summarize_stories(stories, max_stories=args.num)
+        digest = summarizer.summarize_stories(
+            stories, max_stories=args.num, rank_key=ranking_key(stories, rank, scores)
+        )
         print(f"✅ Generated digest with {len(digest.stories)} stories", file=sys.stderr)
         
         if args.format == "md":
@@ -77,6 +116,142 @@ async def main():
         for s in stories:
             print(f"  - {s.title} ({s.score} points)")
 
+    
+    elif args.command == "migrate":
+        from pathlib import Path
+        from src.storage import DATA_DIR
+        from src.sqlite_storage import SQLiteStorage, migrate_from_json
+        
+        json_dir = Path(args.json_dir) if args.json_dir else DATA_DIR / "digests"
+        storage = SQLiteStorage(DATA_DIR / "hn_digest.db")
+        print(f"📦 Migrating {json_dir} -> {storage.path}")
+        result = migrate_from_json(json_dir, storage)
+        print(f"✅ Migrated {len(result['migrated'])} digests")
+        for name, error in result["failed"].items():
+            print(f"⚠️ Skipped {name}: {error}")
+        print("Set HN_DIGEST_STORAGE=sqlite to use it")
+
+    
+    elif args.command == "search":
+        from src.storage import get_search_index, reindex_all
+        
+        if args.reindex:
+            result = reindex_all()
+            print(f"🔎 Indexed {len(result['indexed'])} digests", file=sys.stderr)
+            for date_str, error in result["failed"].items():
+                print(f"⚠️ Skipped {date_str}: {error}", file=sys.stderr)
+        if not args.query:
+            if args.reindex:
+                return
+            parser.error("search needs a query")
+        
+        result = get_search_index().search(
+            args.query,
+            date_from=args.date_from,
+            date_to=args.date_to,
+            category=args.category,
+            limit=args.num,
+            offset=(max(args.page, 1) - 1) * args.num,
+        )
+        print(f"🔎 {result['total']} results for \"{args.query}\" (page {args.page})")
+        for r in result["results"]:
+            label = r["title"] if r["type"] == "story" else f"[intro] {r['date']}"
+            print(f"[{r['date']}] {label}  ({r['category'] or '-'}, {r['score']})")
+            print(f"       {r['url'] or ''}")
+            print()
+
+    
+    elif args.command == "export":
+        from pathlib import Path
+        from src.export import DEFAULT_OUT_DIR, export_site
+        
+        result = export_site(Path(args.out) if args.out else DEFAULT_OUT_DIR, force=args.force)
+        print(f"📦 Exported {result['dates']} dates to {result['out_dir']}")
+        days, months = len(result["days_written"]), len(result["months_written"])
+        print(f"   {days} day files, {months} month bundles written")
+        for date_str, error in result["skipped"].items():
+            print(f"⚠️ Skipped {date_str}: {error}")
+        if not result["brotli"]:
+            print("   (install brotli for .br files)")
+
+    
+    elif args.command == "profile":
+        await profile(args)
+    
+    elif args.command == "send":
+        from src import main as app_main
+        
+        delivery = app_main.get_delivery()
+        if delivery is None:
+            parser.error("send needs TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID")
+        try:
+            digest = await app_main.generate_digest()
+            print(f"📨 Sending {digest.date} to {len(delivery.chat_ids)} chats...")
+            statuses = await delivery.deliver(digest)
+        finally:
+            await app_main.close_clients()
+        for chat_id, status in statuses.items():
+            print(f"  {chat_id}: {status}")
+
+
+async def profile(args):
+    """Run one traced generation and print where its time went."""
+    import json
+    import time
+    from pathlib import Path
+    from src.tracing import critical_path
+    
+    if args.trace:
+        trace_path = Path(args.trace)
+    else:
+        from src import main as app_main
+        
+        app_main.TRACE_GENERATIONS = True
+        profiler = None
+        if args.cprofile:
+            import cProfile
+            profiler = cProfile.Profile()
+            profiler.enable()
+        started = time.time()
+        try:
+            digest = await app_main.generate_digest(force=True, rank=args.rank)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            await app_main.close_clients()
+        print(f"✅ Generated digest with {len(digest.stories)} stories")
+        # Only a trace this run wrote; an older one belongs to some other generation
+        traces = [p for p in app_main.TRACE_DIR.glob("*.json") if p.stat().st_mtime >= started]
+        trace_path = max(traces, key=lambda p: p.stat().st_mtime, default=None)
+        
+        if profiler is not None:
+            import pstats
+            print("\n📊 cProfile, top 20 by cumulative time:")
+            pstats.Stats(profiler, stream=sys.stdout).sort_stats("cumulative").print_stats(20)
+    
+    if trace_path is None:
+        print("⚠️ No trace recorded (another worker generated this digest)")
+        return
+    
+    with open(trace_path, "r", encoding="utf-8") as f:
+        trace = json.load(f)
+    spans = [e for e in trace["traceEvents"] if e.get("ph") == "X"]
+    print(f"\n🧭 Trace {trace_path} ({len(spans)} spans)")
+    
+    print("\nStages:")
+    for e in spans:
+        if e["cat"] == "stage":
+            print(f"  {e['dur'] / 1000:9.1f} ms  {e['name']}")
+    
+    print("\nCritical path:")
+    for depth, e in critical_path(trace):
+        details = ", ".join(
+            f"{k}={v}" for k, v in e["args"].items() if k not in ("span_id", "parent_id")
+        )
+        start = e["ts"] / 1000
+        print(f"  {start:9.1f} ms +{e['dur'] / 1000:8.1f} ms  {'  ' * depth}{e['name']}  {details}")
+    print("\nOpen the trace in chrome://tracing or https://ui.perfetto.dev")
+
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,184 @@
+"""
+In-memory digest cache with pre-rendered response bodies
+"""
+import gzip
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+
+from .locks import ChangeSignal
+from .metrics import CACHE_REQUESTS
+from .summarizer import DailyDigest, DigestedStory, format_digest_markdown, format_digest_telegram
+
+# Rendered variants kept per digest
+BODY_KINDS = ("json", "markdown", "telegram")
+
+
+@dataclass
+class RenderedBody:
+    body: bytes
+    gzipped: bytes
+    etag: str  # strong ETag of the identity body, quoted
+
+    @property
+    def gzip_etag(self) -> str:
+        # A different encoding is a different representation, so it needs its own tag
+        return self.etag[:-1] + '-gz"'
+
+
+@dataclass
+class CachedDigest:
+    digest: DailyDigest
+    generated_at: str | None
+    bodies: dict[str, RenderedBody]
+
+    @property
+    def key(self) -> tuple[str, str | None]:
+        return (self.digest.date, self.generated_at)
+
+
+def story_to_dict(ds: DigestedStory) -> dict:
+    """Public JSON shape of one digested story."""
+    return {
+        "title": ds.story.title,
+        "url": ds.story.url or ds.story.hn_url,
+        "hn_url": ds.story.hn_url,
+        "score": ds.story.score,
+        "comments": ds.story.descendants,
+        "summary_zh": ds.summary_zh,
+        "category": ds.category,
+        "importance": ds.importance,
+    }
+
+
+def digest_to_dict(digest: DailyDigest) -> dict:
+    """Public JSON shape of a digest, as returned by the API."""
+    return {
+        "date": digest.date,
+        "intro": digest.intro,
+        "story_count": len(digest.stories),
+        "stories": [story_to_dict(ds) for ds in digest.stories],
+    }
+
+
+def render_body(body: bytes) -> RenderedBody:
+    """Compress a body once and derive its strong ETag."""
+    digest = hashlib.sha256(body).hexdigest()[:32]
+    return RenderedBody(
+        body=body,
+        gzipped=gzip.compress(body, compresslevel=6, mtime=0),
+        etag=f'"{digest}"',
+    )
+
+
+def render_digest(digest: DailyDigest) -> CachedDigest:
+    """Render every response variant of a digest up front."""
+    payload = json.dumps(digest_to_dict(digest), ensure_ascii=False, separators=(",", ":"))
+    return CachedDigest(
+        digest=digest,
+        generated_at=digest.generated_at,
+        bodies={
+            "json": render_body(payload.encode("utf-8")),
+            "markdown": render_body(format_digest_markdown(digest).encode("utf-8")),
+            "telegram": render_body(format_digest_telegram(digest).encode("utf-8")),
+        },
+    )
+
+
+class DigestCache:
+    """Process-level LRU of rendered digests, keyed by date and generation time.
+
+    With a `signal` attached, entries that another process has since replaced
+    on disk are dropped on the next lookup.
+    """
+
+    def __init__(self, max_entries: int = 32, signal: ChangeSignal | None = None):
+        self.max_entries = max_entries
+        self.signal = signal
+        self._entries: OrderedDict[str, CachedDigest] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, date_str: str) -> CachedDigest | None:
+        with self._lock:
+            self._sync()
+            entry = self._entries.get(date_str)
+            if entry is not None:
+                self._entries.move_to_end(date_str)
+        CACHE_REQUESTS.inc(cache="digest", result="miss" if entry is None else "hit")
+        return entry
+
+    def put(self, digest: DailyDigest) -> CachedDigest:
+        entry = render_digest(digest)
+        with self._lock:
+            current = self._entries.get(digest.date)
+            # Never let a slower loader overwrite a newer generation
+            if current is not None and (current.generated_at or "") > (entry.generated_at or ""):
+                return current
+            self._entries[digest.date] = entry
+            self._entries.move_to_end(digest.date)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def _sync(self):
+        """Drop entries older than the versions other processes have published."""
+        versions = self.signal.poll() if self.signal is not None else None
+        if not versions:
+            return
+        for date_str, entry in list(self._entries.items()):
+            if (entry.generated_at or "") < versions.get(date_str, ""):
+                del self._entries[date_str]
+
+    def invalidate(self, date_str: str | None = None):
+        """Drop one date (or everything) from the cache."""
+        with self._lock:
+            if date_str is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(date_str, None)
+
+
+digest_cache = DigestCache()
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Evaluate an If-None-Match header against an ETag (weak comparison, RFC 9110)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    for candidate in if_none_match.split(","):
+        if candidate.strip().removeprefix("W/") == opaque:
+            return True
+    return False
+
+
+def not_modified_since(if_modified_since: str | None, last_modified: str | None) -> bool:
+    """Evaluate If-Modified-Since against a Last-Modified HTTP date."""
+    if not if_modified_since or not last_modified:
+        return False
+    try:
+        return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+
+
+def accepts_gzip(accept_encoding: str | None) -> bool:
+    """Whether an Accept-Encoding header allows gzip."""
+    if not accept_encoding:
+        return False
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        if coding.strip().lower() in ("gzip", "*"):
+            q = params.strip()
+            if q.startswith("q="):
+                try:
+                    return float(q[2:]) > 0
+                except ValueError:
+                    return False
+            return True
+    return False
@@ -0,0 +1,264 @@
+"""
+Article content extraction - bounded fetching, main-text extraction, on-disk cache
+"""
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+from html.parser import HTMLParser
+from pathlib import Path
+
+import httpx
+
+from .metrics import ARTICLE_SECONDS, CACHE_REQUESTS
+from .scraper import Story
+from .tracing import span
+
+USER_AGENT = "Mozilla/5.0 (compatible; HNDigestBot/1.0)"
+
+# Only these are worth extracting text from; PDFs, images, archives etc. are skipped
+TEXT_CONTENT_TYPES = ("text/html", "application/xhtml+xml", "text/plain")
+
+# Elements whose text is never article content
+SKIP_TAGS = {
+    "script", "style", "noscript", "svg", "nav", "header", "footer", "aside",
+    "form", "button", "iframe", "template",
+}
+BLOCK_TAGS = {
+    "p", "div", "section", "article", "main", "li", "ul", "ol", "br", "tr",
+    "h1", "h2", "h3", "h4", "h5", "h6", "pre", "blockquote", "figcaption",
+}
+VOID_TAGS = {"br", "img", "hr", "meta", "link", "input", "source", "wbr", "col", "area"}
+
+
+class _TextExtractor(HTMLParser):
+    """Collect visible text, separately tracking what sits inside <article>/<main>."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title = ""
+        self._parts: list[str] = []
+        self._main_parts: list[str] = []
+        self._skip_depth = 0
+        self._main_depth = 0
+        self._in_title = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag in VOID_TAGS:
+            if tag == "br":
+                self._newline()
+            return
+        if tag in SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in ("article", "main"):
+            self._main_depth += 1
+        elif tag == "title":
+            self._in_title = True
+        if tag in BLOCK_TAGS:
+            self._newline()
+
+    def handle_endtag(self, tag):
+        if tag in VOID_TAGS:
+            return
+        if tag in SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in ("article", "main"):
+            self._main_depth = max(0, self._main_depth - 1)
+        elif tag == "title":
+            self._in_title = False
+        if tag in BLOCK_TAGS:
+            self._newline()
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+            return
+        if self._skip_depth:
+            return
+        self._parts.append(data)
+        if self._main_depth:
+            self._main_parts.append(data)
+
+    def _newline(self):
+        self._parts.append("\n")
+        if self._main_depth:
+            self._main_parts.append("\n")
+
+    def text(self) -> str:
+        main = _normalize("".join(self._main_parts))
+        # Trust <article>/<main> only when it holds a meaningful share of the page
+        if len(main) >= 200:
+            return main
+        return _normalize("".join(self._parts))
+
+
+def _normalize(text: str) -> str:
+    lines = (re.sub(r"[ \t\r\f\v\xa0]+", " ", line).strip() for line in text.split("\n"))
+    return "\n".join(line for line in lines if line)
+
+
+def extract_main_text(html: str) -> str:
+    """Extract readable main text from an HTML document."""
+    parser = _TextExtractor()
+    try:
+        parser.feed(html)
+        parser.close()
+    except Exception:
+        pass  # keep whatever was parsed before malformed markup
+    return parser.text()
+
+
+class ArticleCache:
+    """Extracted article text on disk, keyed by a hash of the URL."""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+    def _path(self, url: str) -> Path:
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return self.root / key[:2] / f"{key}.json"
+
+    def get(self, url: str) -> dict | None:
+        try:
+            with open(self._path(url), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, url: str, entry: dict):
+        path = self._path(url)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"url": url, **entry}, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+
+class ContentFetcher:
+    """Fetch story URLs over one pooled client and return their main text."""
+
+    def __init__(
+        self,
+        cache: ArticleCache | None = None,
+        max_concurrency: int = 8,
+        max_bytes: int = 512 * 1024,
+        max_chars: int = 8000,
+        timeout: float = 15.0,
+        revalidate_after: float = 6 * 3600,
+    ):
+        self.cache = cache
+        self.max_bytes = max_bytes
+        self.max_chars = max_chars
+        self.revalidate_after = revalidate_after
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._client = httpx.AsyncClient(
+            timeout=httpx.Timeout(timeout, connect=5.0),
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=max_concurrency * 2),
+            headers={"User-Agent": USER_AGENT},
+        )
+
+    async def __aenter__(self) -> "ContentFetcher":
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    async def aclose(self):
+        await self._client.aclose()
+
+    async def fetch(self, url: str | None) -> str | None:
+        """Main text of `url`, from cache when fresh. None if unavailable or not text."""
+        if not url:
+            return None
+
+        with ARTICLE_SECONDS.time(result="cache") as labels:
+            cached = self.cache.get(url) if self.cache is not None else None
+            if cached is not None and time.time() - cached["fetched_at"] < self.revalidate_after:
+                CACHE_REQUESTS.inc(cache="article", result="hit")
+                return cached["text"]
+            CACHE_REQUESTS.inc(cache="article", result="miss")
+
+            headers = {}
+            if cached is not None:
+                if cached.get("etag"):
+                    headers["If-None-Match"] = cached["etag"]
+                if cached.get("last_modified"):
+                    headers["If-Modified-Since"] = cached["last_modified"]
+
+            labels["result"] = "fetched"
+            try:
+                async with self._semaphore:
+                    with span("article", "article", url=url) as args:
+                        entry = await self._download(url, headers)
+                        args["status"] = entry["status"] if entry is not None else 304
+                        args["bytes"] = entry["bytes"] if entry is not None else 0
+            except (httpx.HTTPError, UnicodeDecodeError):
+                # Serve what we had; don't cache a transient failure
+                labels["result"] = "error"
+                return cached["text"] if cached is not None else None
+
+            if entry is not None and (entry["status"] in (408, 429) or entry["status"] >= 500):
+                # Overloaded or rate-limited: keep the cached text and try again next time
+                labels["result"] = "error"
+                return cached["text"] if cached is not None else None
+
+            if entry is None:  # 304 Not Modified
+                labels["result"] = "not_modified"
+                if cached is None:
+                    return None
+                entry = {**cached, "fetched_at": time.time()}
+            if self.cache is not None:
+                self.cache.put(url, entry)
+            return entry["text"]
+
+    async def _download(self, url: str, headers: dict) -> dict | None:
+        async with self._client.stream("GET", url, headers=headers) as resp:
+            if resp.status_code == 304:
+                return None
+
+            entry = {
+                "text": None,
+                "status": resp.status_code,
+                "content_type": resp.headers.get("content-type", ""),
+                "etag": resp.headers.get("etag"),
+                "last_modified": resp.headers.get("last-modified"),
+                "fetched_at": time.time(),
+                "bytes": 0,
+            }
+            media_type = entry["content_type"].split(";")[0].strip().lower()
+            if resp.status_code != 200 or (media_type and media_type not in TEXT_CONTENT_TYPES):
+                return entry
+
+            # Stop reading once we have enough bytes for an excerpt
+            chunks, size = [], 0
+            async for chunk in resp.aiter_bytes():
+                chunks.append(chunk)
+                size += len(chunk)
+                if size >= self.max_bytes:
+                    break
+            body = b"".join(chunks)[: self.max_bytes]
+            entry["bytes"] = len(body)
+            encoding = resp.charset_encoding or "utf-8"
+
+        try:
+            raw = body.decode(encoding, errors="replace")
+        except LookupError:
+            raw = body.decode("utf-8", errors="replace")
+        text = raw if media_type == "text/plain" else extract_main_text(raw)
+        entry["text"] = text[: self.max_chars] or None
+        return entry
+
+    async def fetch_many(self, stories: list[Story]) -> dict[int, str]:
+        """Article text for each story with a URL, keyed by story id."""
+        with_urls = [s for s in stories if s.url]
+        texts = await asyncio.gather(*(self.fetch(s.url) for s in with_urls))
+        return {s.id: text for s, text in zip(with_urls, texts) if text}
+
+
+async def fetch_article_content(url: str, max_chars: int = 8000) -> str | None:
+    """Fetch article content for better summarization (one-off, uncached)."""
+    async with ContentFetcher(max_chars=max_chars) as fetcher:
+        return await fetcher.fetch(url)
@@ -0,0 +1,182 @@
+"""
+Story de-duplication - canonical URLs and MinHash title similarity
+"""
+import random
+import re
+import zlib
+from dataclasses import dataclass, field, replace
+from datetime import date, timedelta
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from .scraper import Story
+from .storage import load_digest
+
+# Query parameters that only identify where a click came from
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "msclkid", "yclid", "igshid", "mc_cid", "mc_eid",
+    "_hsenc", "_hsmi", "ref", "ref_src", "ref_url", "si", "amp", "outputtype",
+}
+HOST_PREFIXES = ("www.", "m.", "mobile.", "amp.")
+TITLE_PREFIX = re.compile(r"^(show|ask|tell|launch) hn\s*:\s*")
+TITLE_TAGS = re.compile(r"\[(pdf|video|audio)\]|\((19|20)\d\d\)")
+# Version numbers like 1.80 stay one token, so different releases don't match
+TITLE_TOKEN = re.compile(r"\w+(?:[.\-]\w+)*")
+STOPWORDS = {
+    "a", "an", "the", "and", "or", "of", "to", "in", "on", "for", "with", "by", "at",
+    "from", "is", "are", "its", "it", "this", "that", "how", "why", "what", "new",
+}
+
+# Titles whose Jaccard similarity (over their word shingles) reaches this are the same story
+TITLE_THRESHOLD = 0.6
+# MinHash signature = BANDS x ROWS; LSH buckets on each band find candidate pairs,
+# which are then checked exactly
+BANDS = 16
+ROWS = 4
+_PRIME = (1 << 61) - 1
+_rng = random.Random(20240101)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(BANDS * ROWS)
+]
+
+
+@dataclass
+class DedupResult:
+    stories: list[Story]  # one candidate per cluster, in input order
+    merged: dict[int, list[int]] = field(default_factory=dict)  # kept id -> folded-in ids
+    seen: list[int] = field(default_factory=list)  # ids dropped as already digested
+
+
+def canonical_url(url: str | None) -> str | None:
+    """The URL without scheme, www/mobile/AMP variants, tracking params or trailing slash."""
+    if not url:
+        return None
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or "").lower()
+    for prefix in HOST_PREFIXES:
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+            break
+
+    path = re.sub(r"/{2,}", "/", parts.path).rstrip("/")
+    path = re.sub(r"^/amp(?=/)|/amp$", "", path)
+    path = re.sub(r"\.amp(?=\.html?$)", "", path)
+    path = re.sub(r"/index\.(html?|php)$", "", path)
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in TRACKING_PARAMS
+    )
+    return urlunsplit(("", host, path, urlencode(query), "")).lstrip("/")
+
+
+def title_shingles(title: str) -> set[str]:
+    """Content words of a title, lower-cased and with a plural "s" dropped."""
+    text = TITLE_TAGS.sub(" ", TITLE_PREFIX.sub("", title.lower()))
+    words = {w for w in TITLE_TOKEN.findall(text) if w not in STOPWORDS}
+    return {w[:-1] if len(w) > 3 and w.endswith("s") and not w.endswith("ss") else w
+            for w in words} or {text}
+
+
+def minhash(shingles: set[str]) -> tuple[int, ...]:
+    hashes = [zlib.crc32(s.encode("utf-8")) for s in shingles]
+    return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS)
+
+
+def jaccard(a: set[str], b: set[str]) -> float:
+    return len(a & b) / len(a | b) if a or b else 0.0
+
+
+def recent_stories(before: str, days: int) -> list[Story]:
+    """Stories in the digests of the `days` days before the date `before`."""
+    day = date.fromisoformat(before)
+    stories = []
+    for n in range(1, days + 1):
+        date_str = (day - timedelta(days=n)).isoformat()
+        try:
+            digest = load_digest(date_str)
+        except (ValueError, KeyError) as e:
+            print(f"⚠️ Dedup skipped {date_str}: {type(e).__name__}: {e}")
+            continue
+        if digest is not None:
+            stories.extend(ds.story for ds in digest.stories)
+    return stories
+
+
+def dedupe_stories(
+    stories: list[Story],
+    recent: list[Story] | None = None,
+    threshold: float = TITLE_THRESHOLD,
+) -> DedupResult:
+    """Merge submissions of the same news into one candidate before summarization.
+
+    Stories sharing a canonical URL, or with near-identical titles, form a
+    cluster; the highest-scoring one is kept and carries the others' ids and
+    feed ranks. Clusters that include a `recent` story (from earlier digests)
+    are dropped altogether.
+    """
+    entries = list(recent or []) + list(stories)
+    first_new = len(entries) - len(stories)
+    parent = list(range(len(entries)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(i: int, j: int):
+        parent[find(i)] = find(j)
+
+    # Same item or same canonical URL
+    owners: dict[str, int] = {}
+    for i, s in enumerate(entries):
+        for key in (f"id:{s.id}" if s.id else None, canonical_url(s.url)):
+            if key is None:
+                continue
+            if key in owners:
+                union(i, owners[key])
+            else:
+                owners[key] = i
+
+    # Similar titles: only pairs sharing an LSH band are compared. A title must
+    # also be similar to the cluster's root, so clusters can't drift by chaining.
+    shingles = [title_shingles(s.title) for s in entries]
+    buckets: dict[tuple, list[int]] = {}
+    for i, sig in enumerate(minhash(s) for s in shingles):
+        for band in range(BANDS):
+            key = (band, sig[band * ROWS:(band + 1) * ROWS])
+            for j in buckets.get(key, []):
+                root = find(j)
+                if find(i) == root or jaccard(shingles[i], shingles[j]) < threshold:
+                    continue
+                if jaccard(shingles[i], shingles[root]) >= threshold:
+                    union(i, j)
+            buckets.setdefault(key, []).append(i)
+
+    clusters: dict[int, list[int]] = {}
+    for i in range(len(entries)):
+        clusters.setdefault(find(i), []).append(i)
+
+    result = DedupResult(stories=[])
+    for i in range(first_new, len(entries)):
+        members = clusters[find(i)]
+        new = [entries[j] for j in members if j >= first_new]
+        if members[0] < first_new:
+            if entries[i].id not in result.seen:
+                result.seen.append(entries[i].id)
+            continue
+        best = max(new, key=lambda s: s.score)
+        if entries[i] is not best:
+            continue
+        others = [s for s in new if s is not best]
+        if not others:
+            result.stories.append(best)
+            continue
+        feeds = dict(best.feeds)
+        for s in others:
+            for feed, rank in s.feeds.items():
+                feeds[feed] = min(rank, feeds.get(feed, rank))
+        duplicates = best.duplicates + [s.id for s in others]
+        # A copy: the originals may be shared with the live story set
+        result.stories.append(replace(best, feeds=feeds, duplicates=duplicates))
+        result.merged[best.id] = [s.id for s in others]
+    return result
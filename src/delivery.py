@@ -0,0 +1,279 @@
+"""
+Telegram delivery - rate-limited concurrent sends with resumable per-chat state
+"""
+import asyncio
+import json
+import os
+import random
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+
+from .locks import FileLock
+from .metrics import RETRIES, TELEGRAM_MESSAGES
+from .summarizer import DailyDigest, format_digest_telegram
+
+TELEGRAM_API_BASE = os.getenv("TELEGRAM_API_BASE", "https://api.telegram.org")
+
+# Bot API limits: text length in UTF-16 code units, ~30 messages/s overall and
+# about one per second in any single chat
+MESSAGE_LIMIT = 4096
+GLOBAL_RATE = 30.0
+CHAT_RATE = 1.0
+
+# Dates of delivery state kept per chat
+STATE_DAYS = 14
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second, bursting up to `capacity`.
+
+    Waiters are served in arrival order. `pause` empties the bucket for a
+    while, e.g. when the server answers with retry_after.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                elif self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                else:
+                    await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def pause(self, seconds: float):
+        now = time.monotonic()
+        self._refill(now)
+        self._tokens = 0.0
+        self._paused_until = max(self._paused_until, now + seconds)
+
+
+def message_length(text: str) -> int:
+    """Length as Telegram counts it (UTF-16 code units)."""
+    return len(text.encode("utf-16-le")) // 2
+
+
+def split_message(text: str, limit: int = MESSAGE_LIMIT) -> list[str]:
+    """Split text into messages within `limit`, preferring paragraph, then line breaks."""
+    if message_length(text) <= limit:
+        return [text]
+
+    parts, current = [], ""
+    for block in _pieces(text, limit):
+        candidate = f"{current}\n\n{block}" if current else block
+        if message_length(candidate) <= limit:
+            current = candidate
+        else:
+            if current:
+                parts.append(current)
+            current = block
+    if current:
+        parts.append(current)
+    return parts
+
+
+def _pieces(text: str, limit: int) -> list[str]:
+    """Paragraphs, with any over the limit broken into lines and then hard-cut."""
+    pieces = []
+    for paragraph in text.split("\n\n"):
+        if message_length(paragraph) <= limit:
+            pieces.append(paragraph)
+            continue
+        chunk = ""
+        for line in paragraph.split("\n"):
+            while message_length(line) > limit:
+                cut = limit
+                while message_length(line[:cut]) > limit:
+                    cut -= 1
+                if chunk:
+                    pieces.append(chunk)
+                    chunk = ""
+                pieces.append(line[:cut])
+                line = line[cut:]
+            candidate = f"{chunk}\n{line}" if chunk else line
+            if message_length(candidate) <= limit:
+                chunk = candidate
+            else:
+                pieces.append(chunk)
+                chunk = line
+        if chunk:
+            pieces.append(chunk)
+    return pieces
+
+
+class DeliveryState:
+    """Which parts of which digest each chat has received, persisted after every send."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.chats: dict[str, dict[str, dict]] = {}
+        self.reload()
+
+    def reload(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.chats = json.load(f)
+        except (OSError, ValueError):
+            self.chats = {}
+
+    def get(self, chat_id: str, date: str) -> dict:
+        return self.chats.get(chat_id, {}).get(date) or {"sent": 0, "message_ids": []}
+
+    def record(self, chat_id: str, date: str, entry: dict):
+        days = self.chats.setdefault(chat_id, {})
+        days[date] = {**entry, "updated_at": datetime.now(timezone.utc).isoformat()}
+        for old in sorted(days)[:-STATE_DAYS]:
+            del days[old]
+        self._save()
+
+    def _save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.chats, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.path)
+
+
+class TelegramError(Exception):
+    """A send the Bot API rejected for good (bad chat, blocked bot, bad markup...)."""
+
+
+class TelegramDelivery:
+    """Send digests to many chats concurrently over one pooled client.
+
+    Every message waits for its chat's token bucket and then the global one.
+    A 429 pauses the chat for its retry_after; 5xx and network errors are
+    retried with backoff. Progress is recorded per message, and the whole
+    delivery runs under a file lock, so restarts and other workers skip what
+    was already sent.
+    """
+
+    def __init__(
+        self,
+        token: str,
+        chat_ids: list[str],
+        state_path: Path,
+        api_base: str | None = None,
+        global_rate: float = GLOBAL_RATE,
+        chat_rate: float = CHAT_RATE,
+        max_retries: int = 5,
+        timeout: float = 30.0,
+    ):
+        self.token = token
+        self.chat_ids = chat_ids
+        self.api_base = (api_base or TELEGRAM_API_BASE).rstrip("/")
+        self.max_retries = max_retries
+        self.state = DeliveryState(state_path)
+        self._lock = FileLock(Path(state_path).with_suffix(".lock"))
+        self._running = asyncio.Lock()  # the file lock is per process, not per call
+        self._global = TokenBucket(global_rate, capacity=global_rate)
+        self._chat_rate = chat_rate
+        self._chats: dict[str, TokenBucket] = {}
+        self._client = httpx.AsyncClient(
+            timeout=httpx.Timeout(timeout, connect=10.0),
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=32),
+        )
+
+    async def aclose(self):
+        await self._client.aclose()
+
+    def _bucket(self, chat_id: str) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            bucket = self._chats[chat_id] = TokenBucket(self._chat_rate)
+        return bucket
+
+    async def deliver(self, digest: DailyDigest) -> dict[str, str]:
+        """Send `digest` to every chat that hasn't had it yet. Returns a status per chat."""
+        parts = split_message(format_digest_telegram(digest))
+        async with self._running:
+            await self._lock.acquire_async()
+            try:
+                self.state.reload()
+                results = await asyncio.gather(
+                    *(self._deliver_chat(chat, digest.date, parts) for chat in self.chat_ids),
+                    return_exceptions=True,
+                )
+            finally:
+                self._lock.release()
+
+        statuses = {}
+        for chat_id, result in zip(self.chat_ids, results):
+            if isinstance(result, Exception):
+                print(f"⚠️ Telegram delivery to {chat_id} failed: {result}")
+                statuses[chat_id] = f"error: {result}"
+            else:
+                statuses[chat_id] = result
+        return statuses
+
+    async def _deliver_chat(self, chat_id: str, date: str, parts: list[str]) -> str:
+        entry = self.state.get(chat_id, date)
+        if entry["sent"] >= len(parts) or entry.get("done"):
+            return "already_sent"
+        for i in range(entry["sent"], len(parts)):
+            message_id = await self._send(chat_id, parts[i])
+            entry = {
+                "sent": i + 1,
+                "parts": len(parts),
+                "message_ids": entry["message_ids"] + [message_id],
+                "done": i + 1 == len(parts),
+            }
+            self.state.record(chat_id, date, entry)
+        return "sent"
+
+    async def _send(self, chat_id: str, text: str) -> int:
+        """POST one sendMessage, honouring rate limits and retry_after. Returns message_id."""
+        url = f"{self.api_base}/bot{self.token}/sendMessage"
+        payload = {
+            "chat_id": chat_id,
+            "text": text,
+            "parse_mode": "HTML",
+            "disable_web_page_preview": True,
+        }
+        bucket = self._bucket(chat_id)
+        attempt = 0
+        while True:
+            await bucket.acquire()
+            await self._global.acquire()
+            try:
+                response = await self._client.post(url, json=payload)
+                data = response.json()
+            except (httpx.TransportError, ValueError):
+                response, data = None, {}
+            if data.get("ok"):
+                TELEGRAM_MESSAGES.inc(result="sent")
+                return data["result"]["message_id"]
+
+            status = response.status_code if response is not None else None
+            if status is not None and status < 500 and status != 429:
+                TELEGRAM_MESSAGES.inc(result="rejected")
+                raise TelegramError(f"{status} {data.get('description', '')}".strip())
+            if attempt >= self.max_retries:
+                TELEGRAM_MESSAGES.inc(result="failed")
+                raise TelegramError(f"gave up after {attempt + 1} attempts (status {status})")
+            if status == 429:
+                TELEGRAM_MESSAGES.inc(result="rate_limited")
+                retry_after = (data.get("parameters") or {}).get("retry_after", 1)
+                bucket.pause(float(retry_after))
+            else:
+                bucket.pause(min(2 ** attempt, 30) * (0.5 + random.random()))
+            attempt += 1
+            RETRIES.inc(client="telegram")
@@ -0,0 +1,45 @@
+"""
+Progress events - fan one generation's events out to any number of streaming clients
+"""
+import asyncio
+from typing import AsyncIterator
+
+Event = tuple[str, dict]
+
+
+class EventChannel:
+    """Replayable event log for one run; late subscribers get everything so far, then live."""
+
+    def __init__(self):
+        self.events: list[Event] = []
+        self.closed = False
+        self._queues: set[asyncio.Queue] = set()
+
+    def emit(self, event: str, data: dict):
+        if self.closed:
+            return
+        self.events.append((event, data))
+        for queue in self._queues:
+            queue.put_nowait((event, data))
+
+    def close(self):
+        self.closed = True
+        for queue in self._queues:
+            queue.put_nowait(None)
+
+    async def subscribe(self) -> AsyncIterator[Event]:
+        """Yield past events, then new ones until the channel closes."""
+        queue: asyncio.Queue = asyncio.Queue()
+        # Snapshot and registration happen without an await, so nothing falls in between
+        history, closed = list(self.events), self.closed
+        if not closed:
+            self._queues.add(queue)
+        try:
+            for event in history:
+                yield event
+            if closed:
+                return
+            while (event := await queue.get()) is not None:
+                yield event
+        finally:
+            self._queues.discard(queue)
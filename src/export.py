@@ -0,0 +1,120 @@
+"""
+Static-site export - write docs/data incrementally from storage
+"""
+import gzip
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from .storage import _serialize_digest, list_digests, load_digest
+
+try:
+    import brotli
+except ImportError:  # optional: pip install brotli
+    brotli = None
+
+DEFAULT_OUT_DIR = Path(__file__).resolve().parent.parent / "docs" / "data"
+
+
+def _compact(data) -> bytes:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _content_hash(body: bytes) -> str:
+    return hashlib.sha256(body).hexdigest()
+
+
+def _write(path: Path, body: bytes):
+    """Atomically write `body` plus precompressed .gz (and .br) siblings."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    variants = {path: body, path.with_name(path.name + ".gz"): gzip.compress(body, 9, mtime=0)}
+    if brotli is not None:
+        variants[path.with_name(path.name + ".br")] = brotli.compress(body)
+    for target, data in variants.items():
+        tmp = target.with_name(f".{target.name}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, target)
+
+
+def _remove(path: Path):
+    for target in (path, path.with_name(path.name + ".gz"), path.with_name(path.name + ".br")):
+        target.unlink(missing_ok=True)
+
+
+def export_site(out_dir: Path = DEFAULT_OUT_DIR, force: bool = False) -> dict:
+    """Write changed day files, monthly bundles and the dates manifest.
+
+    Layout under `out_dir`:
+      dates.json                    all dates, newest first
+      digests/<date>.json           one day
+      months.json                   {"YYYY-MM": "months/YYYY-MM.<hash>.json"}
+      months/YYYY-MM.<hash>.json    every day of a month, content-hashed
+      manifest.json                 content hashes used to skip unchanged files
+
+    Each JSON file gets precompressed .gz (and .br when brotli is installed) siblings.
+    """
+    out_dir = Path(out_dir)
+    manifest_path = out_dir / "manifest.json"
+    manifest = {"days": {}, "months": {}}
+    if manifest_path.exists() and not force:
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+
+    dates, skipped = [], {}
+    days_written, months_written = [], []
+    day_hashes: dict[str, str] = {}
+    by_month: dict[str, list[dict]] = {}
+
+    for date_str in list_digests(limit=1_000_000):
+        try:
+            digest = load_digest(date_str)
+        except (ValueError, KeyError) as e:
+            skipped[date_str] = f"{type(e).__name__}: {e}"
+            continue
+        if digest is None:
+            continue
+        dates.append(date_str)
+        data = _serialize_digest(digest)
+        data["generated_at"] = digest.generated_at  # keep output stable across exports
+        body = _compact(data)
+        day_hash = _content_hash(body)
+        day_hashes[date_str] = day_hash
+        by_month.setdefault(date_str[:7], []).append(data)
+
+        day_path = out_dir / "digests" / f"{date_str}.json"
+        if manifest["days"].get(date_str) != day_hash or not day_path.exists():
+            _write(day_path, body)
+            days_written.append(date_str)
+
+    month_files = {}
+    for month, digests in sorted(by_month.items()):
+        previous = manifest["months"].get(month)
+        # A month changes only when one of its days does
+        month_hash = _content_hash(
+            "".join(day_hashes[d["date"]] for d in digests).encode("ascii")
+        )[:12]
+        name = f"months/{month}.{month_hash}.json"
+        month_files[month] = name
+        if previous != name or not (out_dir / name).exists():
+            _write(out_dir / name, _compact({"month": month, "digests": digests}))
+            months_written.append(month)
+            if previous and previous != name:
+                _remove(out_dir / previous)
+
+    dates_body = _compact(dates)
+    if manifest.get("dates") != _content_hash(dates_body) or not (out_dir / "dates.json").exists():
+        _write(out_dir / "dates.json", dates_body)
+    if manifest["months"] != month_files or not (out_dir / "months.json").exists():
+        _write(out_dir / "months.json", _compact(month_files))
+
+    manifest = {"days": day_hashes, "months": month_files, "dates": _content_hash(dates_body)}
+    manifest_path.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+
+    return {
+        "out_dir": str(out_dir),
+        "dates": len(dates),
+        "days_written": days_written,
+        "months_written": months_written,
+        "skipped": skipped,
+        "brotli": brotli is not None,
+    }
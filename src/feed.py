@@ -0,0 +1,202 @@
+"""
+RSS/Atom feeds - the last N digests, re-rendered only when a digest changes
+"""
+import html
+import os
+import threading
+import time
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import format_datetime
+
+from .cache import RenderedBody, render_body
+from .locks import ChangeSignal
+from .metrics import CACHE_REQUESTS
+from .storage import DATA_DIR, list_digests, load_digest
+from .summarizer import DailyDigest
+
+# Public base URL used for links in the feeds
+SITE_URL = os.getenv("HN_DIGEST_SITE_URL", "https://hn.indiekit.ai").rstrip("/")
+FEED_TITLE = "HN 每日精选"
+FEED_DESCRIPTION = "AI-powered daily Hacker News digest in Chinese"
+# Atom requires an author for every entry; one at feed level covers them all
+FEED_AUTHOR = os.getenv("HN_FEED_AUTHOR", "HN Digest")
+
+# Digests per feed
+FEED_DIGESTS = int(os.getenv("HN_FEED_DIGESTS", "20"))
+# Without a change signal (e.g. files copied in by hand), re-list dates this often
+FEED_RECHECK_SECONDS = 600
+
+FEED_KINDS = ("rss", "atom")
+
+
+@dataclass
+class FeedItem:
+    date: str
+    generated_at: str
+    updated: datetime
+    rss: str  # serialized <item>
+    atom: str  # serialized <entry>
+
+
+def _timestamp(digest: DailyDigest) -> datetime:
+    if digest.generated_at:
+        stamp = datetime.fromisoformat(digest.generated_at)
+    else:
+        stamp = datetime.fromisoformat(digest.date)
+    return stamp if stamp.tzinfo else stamp.replace(tzinfo=timezone.utc)
+
+
+def _digest_html(digest: DailyDigest) -> str:
+    esc = html.escape
+    parts = [f"<p>{esc(digest.intro)}</p>", "<ol>"]
+    for ds in digest.stories:
+        url = ds.story.url or ds.story.hn_url
+        parts.append(
+            f'<li><a href="{esc(url)}">{esc(ds.story.title)}</a> '
+            f'({ds.story.score} points, <a href="{esc(ds.story.hn_url)}">'
+            f"{ds.story.descendants} comments</a>)<br/>{esc(ds.summary_zh)}</li>"
+        )
+    parts.append("</ol>")
+    return "".join(parts)
+
+
+def _sub(parent: ET.Element, tag: str, text: str | None = None, **attrs) -> ET.Element:
+    element = ET.SubElement(parent, tag, attrs)
+    element.text = text
+    return element
+
+
+def render_item(digest: DailyDigest) -> FeedItem:
+    """One digest as an RSS <item> and an Atom <entry>."""
+    updated = _timestamp(digest)
+    link = f"{SITE_URL}/digests/{digest.date}"
+    title = f"{FEED_TITLE} | {digest.date}"
+    body = _digest_html(digest)
+
+    item = ET.Element("item")
+    _sub(item, "title", title)
+    _sub(item, "link", link)
+    _sub(item, "guid", link, isPermaLink="true")
+    _sub(item, "pubDate", format_datetime(updated, usegmt=True))
+    _sub(item, "description", body)
+
+    entry = ET.Element("entry")
+    _sub(entry, "title", title)
+    _sub(entry, "link", href=link)
+    _sub(entry, "id", link)
+    _sub(entry, "updated", updated.isoformat())
+    _sub(entry, "content", body, type="html")
+
+    return FeedItem(
+        date=digest.date,
+        generated_at=digest.generated_at or "",
+        updated=updated,
+        rss=ET.tostring(item, encoding="unicode"),
+        atom=ET.tostring(entry, encoding="unicode"),
+    )
+
+
+def assemble_rss(items: list[FeedItem]) -> bytes:
+    esc = html.escape
+    head = (
+        f"<title>{esc(FEED_TITLE)}</title>"
+        f"<link>{esc(SITE_URL)}/</link>"
+        f"<description>{esc(FEED_DESCRIPTION)}</description>"
+        "<language>zh-cn</language>"
+    )
+    if items:
+        head += f"<lastBuildDate>{format_datetime(items[0].updated, usegmt=True)}</lastBuildDate>"
+    return (
+        '<?xml version="1.0" encoding="utf-8"?>\n<rss version="2.0"><channel>'
+        + head + "".join(i.rss for i in items) + "</channel></rss>"
+    ).encode("utf-8")
+
+
+def assemble_atom(items: list[FeedItem]) -> bytes:
+    esc = html.escape
+    updated = items[0].updated if items else datetime.now(timezone.utc)
+    head = (
+        f"<title>{esc(FEED_TITLE)}</title>"
+        f"<subtitle>{esc(FEED_DESCRIPTION)}</subtitle>"
+        f'<link href="{esc(SITE_URL)}/" />'
+        f'<link rel="self" href="{esc(SITE_URL)}/feed.xml?format=atom" />'
+        f"<id>{esc(SITE_URL)}/</id>"
+        f"<updated>{updated.isoformat()}</updated>"
+        f"<author><name>{esc(FEED_AUTHOR)}</name></author>"
+    )
+    return (
+        '<?xml version="1.0" encoding="utf-8"?>\n<feed xmlns="http://www.w3.org/2005/Atom">'
+        + head + "".join(i.atom for i in items) + "</feed>"
+    ).encode("utf-8")
+
+
+class FeedCache:
+    """The feeds as pre-rendered, pre-compressed bodies, shared by every request.
+
+    Requests only stat the digest change signal. When a digest is saved (here
+    or in another worker), only that day's entry is re-rendered and the feed
+    documents are reassembled from the kept entries. Never generates digests.
+    """
+
+    def __init__(
+        self,
+        signal: ChangeSignal,
+        max_items: int = FEED_DIGESTS,
+        recheck_after: float = FEED_RECHECK_SECONDS,
+    ):
+        self.signal = signal
+        self.max_items = max_items
+        self.recheck_after = recheck_after
+        self.last_modified: str | None = None
+        self._items: dict[str, FeedItem] = {}
+        self._bodies: dict[str, RenderedBody] | None = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, kind: str) -> tuple[RenderedBody, str | None]:
+        """(rendered feed, Last-Modified header value) for "rss" or "atom"."""
+        with self._lock:
+            versions = self.signal.poll()
+            stale = (
+                self._bodies is None
+                or versions is not None
+                or time.monotonic() - self._checked_at > self.recheck_after
+            )
+            CACHE_REQUESTS.inc(cache="feed", result="miss" if stale else "hit")
+            if stale:
+                self._refresh(versions or {})
+            return self._bodies[kind], self.last_modified
+
+    def _refresh(self, versions: dict[str, str]):
+        self._checked_at = time.monotonic()
+        dates = list_digests(self.max_items)
+        # Dates that fell out of the window, then any new or re-saved ones
+        changed = set(self._items) - set(dates)
+        for date_str in changed:
+            del self._items[date_str]
+        for date_str in dates:
+            held = self._items.get(date_str)
+            if held is not None and versions.get(date_str, "") <= held.generated_at:
+                continue
+            try:
+                digest = load_digest(date_str)
+            except (ValueError, KeyError) as e:
+                print(f"⚠️ Feed skipped {date_str}: {type(e).__name__}: {e}")
+                continue
+            if digest is not None:
+                self._items[date_str] = render_item(digest)
+                changed.add(date_str)
+
+        if changed or self._bodies is None:
+            items = [self._items[d] for d in dates if d in self._items]
+            self._bodies = {
+                "rss": render_body(assemble_rss(items)),
+                "atom": render_body(assemble_atom(items)),
+            }
+            newest = max((i.updated for i in items), default=None)
+            self.last_modified = format_datetime(newest, usegmt=True) if newest else None
+
+
+feed_cache = FeedCache(ChangeSignal(DATA_DIR / "digests.version"))
@@ -0,0 +1,99 @@
+"""
+Persistent HN item cache - on-disk JSON per item with an in-memory LRU in front
+"""
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+
+from .metrics import CACHE_REQUESTS
+
+# Seconds a cached item may be served before it is fetched again. HN returns
+# whole items, so score and comment count (the only fields that change on a
+# story) share one window.
+DEFAULT_TTL = 600.0
+
+
+def parse_ttl(spec: str | None) -> float:
+    """Parse HN_ITEM_TTL: seconds, or the older "score=600,descendants=900" (shortest wins)."""
+    if not spec:
+        return DEFAULT_TTL
+    if "=" not in spec:
+        return float(spec)
+    return min(float(part.partition("=")[2]) for part in spec.split(",") if "=" in part)
+
+
+@dataclass
+class CachedItem:
+    item: dict
+    fetched_at: float  # unix time the item was last fetched
+
+    def age(self, now: float | None = None) -> float:
+        return (now or time.time()) - self.fetched_at
+
+
+class ItemCache:
+    """Item payloads keyed by id, served from cache for `ttl` seconds after each fetch."""
+
+    def __init__(self, root: Path, ttl: float = DEFAULT_TTL, max_memory: int = 4096):
+        self.root = Path(root)
+        self.ttl = ttl
+        self.max_memory = max_memory
+        self._memory: OrderedDict[int, CachedItem] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, item_id: int) -> Path:
+        # Shard so no directory grows past ~100k entries
+        return self.root / str(item_id // 100_000) / f"{item_id}.json"
+
+    def _remember(self, item_id: int, entry: CachedItem):
+        with self._lock:
+            self._memory[item_id] = entry
+            self._memory.move_to_end(item_id)
+            while len(self._memory) > self.max_memory:
+                self._memory.popitem(last=False)
+
+    def get(self, item_id: int) -> CachedItem | None:
+        """Return the cached entry regardless of freshness."""
+        with self._lock:
+            entry = self._memory.get(item_id)
+            if entry is not None:
+                self._memory.move_to_end(item_id)
+                return entry
+
+        try:
+            with open(self._path(item_id), "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        entry = CachedItem(item=data["item"], fetched_at=data["fetched_at"])
+        self._remember(item_id, entry)
+        return entry
+
+    def put(self, item_id: int, item: dict, fetched_at: float | None = None) -> CachedItem:
+        entry = CachedItem(item=item, fetched_at=fetched_at or time.time())
+        self._remember(item_id, entry)
+
+        path = self._path(item_id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"fetched_at": entry.fetched_at, "item": item}, f, ensure_ascii=False)
+        os.replace(tmp, path)
+        return entry
+
+    def is_fresh(self, entry: CachedItem, now: float | None = None) -> bool:
+        return entry.age(now) < self.ttl
+
+    def lookup(self, item_id: int) -> dict | None:
+        """The cached payload if it is still fresh, else None."""
+        entry = self.get(item_id)
+        if entry is not None and self.is_fresh(entry):
+            CACHE_REQUESTS.inc(cache="item", result="hit")
+            return entry.item
+        CACHE_REQUESTS.inc(cache="item", result="miss")
+        return None
@@ -0,0 +1,112 @@
+"""
+Cross-process coordination - advisory file locks and a shared change signal
+"""
+import asyncio
+import json
+import os
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows; locking degrades to a no-op
+    fcntl = None
+
+
+class FileLock:
+    """Exclusive advisory lock (flock) on a file, released by the OS if the holder dies."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._fd: int | None = None
+
+    @property
+    def held(self) -> bool:
+        return self._fd is not None
+
+    def _open(self) -> int:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        return os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+
+    def try_acquire(self) -> bool:
+        """Take the lock if no other process holds it."""
+        if self._fd is not None:
+            return True
+        fd = self._open()
+        if fcntl is not None:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                return False
+        self._fd = fd
+        return True
+
+    def acquire(self):
+        """Block until the lock is ours."""
+        if self._fd is not None:
+            return
+        fd = self._open()
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        self._fd = fd
+
+    async def acquire_async(self, poll_interval: float = 0.25):
+        """Wait for the lock without blocking the event loop."""
+        while not self.try_acquire():
+            await asyncio.sleep(poll_interval)
+
+    def release(self):
+        if self._fd is None:
+            return
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        os.close(self._fd)
+        self._fd = None
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class ChangeSignal:
+    """A small shared {key: version} file that lets processes notice each other's writes.
+
+    Writers publish a new version per key; readers stat the file and only
+    re-read it when it has been replaced since they last looked.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = FileLock(self.path.with_name(self.path.name + ".lock"))
+        self._seen: tuple[int, int, int] | None = None
+
+    def _read(self) -> dict[str, str]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def publish(self, key: str, version: str):
+        with self._lock:
+            versions = self._read()
+            versions[key] = version
+            tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(versions, f)
+            os.replace(tmp, self.path)
+
+    def poll(self) -> dict[str, str] | None:
+        """The current versions if the file changed since the last poll, else None."""
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        stamp = (st.st_ino, st.st_mtime_ns, st.st_size)
+        if stamp == self._seen:
+            return None
+        self._seen = stamp
+        return self._read()
@@ -2,41 +2,159 @@
 HN Digest API Server
 """
 import os
+import json
 import asyncio
-from datetime import date, datetime
+import time
+import zlib
+from datetime import datetime
 from contextlib import asynccontextmanager
+from zoneinfo import ZoneInfo
 
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import HTMLResponse, PlainTextResponse
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import (
+    HTMLResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse,
+)
 from pydantic import BaseModel
 from dotenv import load_dotenv
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.cron import CronTrigger
 
-from .scraper import fetch_top_stories, fetch_best_stories, fetch_show_hn
+from .scraper import (
+    CommentCrawler, CrawlBudget, HNClient, comment_digest, fetch_feeds, parse_feeds
+)
 from .summarizer import (
-    create_summarizer, 
+    COMMENT_EXCERPT_CHARS,
+    create_async_summarizer,
+    select_stories,
+    AsyncSummarizer,
     DailyDigest, 
-    format_digest_markdown,
-    format_digest_telegram,
 )
-from .storage import save_digest, load_digest, load_today, list_digests, get_stats
+from .item_cache import ItemCache, parse_ttl
+from .content import ArticleCache, ContentFetcher
+from .dedup import dedupe_stories, recent_stories
+from .delivery import TelegramDelivery
+from .feed import FEED_KINDS, feed_cache
+from .summary_cache import SummaryCache
+from .storage import (
+    DATA_DIR,
+    save_digest,
+    load_digest,
+    digest_version,
+    list_digests,
+    get_stats,
+    get_search_index,
+    reindex_all,
+    iter_stories,
+    make_cursor,
+    parse_cursor,
+)
+from .cache import (
+    CachedDigest, RenderedBody, digest_cache, digest_to_dict, story_to_dict, etag_matches,
+    accepts_gzip, not_modified_since,
+)
+from .events import EventChannel
+from .locks import FileLock
+from .metrics import HTTP_SECONDS, STORIES_DEDUPED, render_metrics
+from .tracing import Trace, activate, span
+from .scores import RANK_MODES, ScoreStore, ranking_key
+from .singleflight import SingleFlight
+from .poller import LiveStorySet, StoryPoller
 
 load_dotenv()
 
+# Refreshes arriving within this window of a finished generation reuse its result
+REFRESH_DEBOUNCE_SECONDS = float(os.getenv("HN_DIGEST_REFRESH_DEBOUNCE", "60"))
+
+_generations = SingleFlight()
+_progress: dict[str, EventChannel] = {}  # date -> events of its current/last generation
+_last_generated: dict[str, float] = {}  # date -> monotonic time of last finished generation
+_unreadable: dict[str, str | None] = {}  # date -> version of a stored digest that failed to load
+_summarizer: AsyncSummarizer | None = None
+_hn_client: HNClient | None = None
+_content_fetcher: ContentFetcher | None = None
+_delivery: TelegramDelivery | None = None
+
+# Push each day's digest to these Telegram chats (comma-separated ids)
+TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN", "")
+TELEGRAM_CHAT_IDS = [c.strip() for c in os.getenv("TELEGRAM_CHAT_ID", "").split(",") if c.strip()]
+
+# Feed extracted article text to the summarizer
+FETCH_ARTICLES = os.getenv("HN_FETCH_ARTICLES", "1") == "1"
+
+# Feed a digest of each story's top comments to the summarizer, within these budgets
+FETCH_COMMENTS = os.getenv("HN_FETCH_COMMENTS", "1") == "1"
+COMMENT_BUDGET = CrawlBudget(
+    max_nodes=int(os.getenv("HN_COMMENTS_PER_STORY", "30")),
+    max_depth=int(os.getenv("HN_COMMENT_DEPTH", "2")),
+)
+COMMENT_DEADLINE_SECONDS = float(os.getenv("HN_COMMENT_DEADLINE", "10"))
+
+# Merge duplicate submissions, and skip stories from the last HN_DEDUP_DAYS days' digests
+DEDUP_STORIES = os.getenv("HN_DEDUP", "1") == "1"
+DEDUP_DAYS = int(os.getenv("HN_DEDUP_DAYS", "2"))
+
+# Stories per /digests/export page
+EXPORT_PAGE_SIZE = 1000
+EXPORT_MAX_PAGE_SIZE = 10_000
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+# Candidate feeds and how many stories to take from each, e.g. "top:30,best:10,show:10,ask:10"
+DIGEST_FEEDS = parse_feeds(os.getenv("HN_DIGEST_FEEDS", "top:30"))
+
+# How stories are picked: score, velocity (points/hour) or comments (comments/hour)
+RANK_MODE = os.getenv("HN_DIGEST_RANK", "score")
+score_store = ScoreStore(DATA_DIR / "scores")
+
+# Save a Chrome-trace timeline of every generation under DATA_DIR/traces
+TRACE_GENERATIONS = os.getenv("HN_DIGEST_TRACE", "0") == "1"
+TRACE_DIR = DATA_DIR / "traces"
+
+# Background poller keeping today's candidate stories resident (0 disables it)
+POLL_INTERVAL_SECONDS = float(os.getenv("HN_POLL_INTERVAL", "120"))
+live_stories = LiveStorySet()
+
+# Daily generation schedule. "Today" is evaluated in DIGEST_TZ (server local time if unset).
+DIGEST_TZ = ZoneInfo(os.environ["HN_DIGEST_TZ"]) if os.getenv("HN_DIGEST_TZ") else None
+DIGEST_HOUR = int(os.getenv("HN_DIGEST_HOUR", "8"))
+REFRESH_HOURS = [int(h) for h in os.getenv("HN_DIGEST_REFRESH_HOURS", "").split(",") if h.strip()]
+scheduler = AsyncIOScheduler(timezone=DIGEST_TZ) if DIGEST_TZ else AsyncIOScheduler()
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup: generate today's digest
+    # Startup: only schedule work, so the app is serving immediately
     print("🍊 HN Digest starting up...")
-    try:
-        await generate_digest()
-        print("✅ Initial digest generated")
-    except Exception as e:
-        print(f"⚠️ Failed to generate initial digest: {e}")
+    if POLL_INTERVAL_SECONDS > 0:
+        StoryPoller(
+            get_hn_client(), live_stories, interval=POLL_INTERVAL_SECONDS, scores=score_store
+        ).start(scheduler)
+    schedule_generation(scheduler)
+    scheduler.add_job(backfill_search_index, id="search-backfill", replace_existing=True)
+    scheduler.start()
     yield
     # Shutdown
+    scheduler.shutdown(wait=False)
+    await close_clients()
     print("👋 HN Digest shutting down")
 
 
+async def close_clients():
+    """Close the process-wide HTTP clients."""
+    global _summarizer, _hn_client, _content_fetcher, _delivery
+    if _summarizer is not None:
+        await _summarizer.aclose()
+        _summarizer = None
+    if _hn_client is not None:
+        await _hn_client.aclose()
+        _hn_client = None
+    if _content_fetcher is not None:
+        await _content_fetcher.aclose()
+        _content_fetcher = None
+    if _delivery is not None:
+        await _delivery.aclose()
+        _delivery = None
+
+
 app = FastAPI(
     title="HN Digest",
     description="AI-powered daily Hacker News digest in Chinese",
@@ -45,6 +163,25 @@ app = FastAPI(
 )
 
 
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    """Per-route latency histogram, labelled by the route template rather than the raw path."""
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        HTTP_SECONDS.observe(
+            time.perf_counter() - start,
+            method=request.method,
+            route=route.path if route is not None else "unmatched",
+            status=status,
+        )
+
+
 class DigestResponse(BaseModel):
     date: str
     intro: str
@@ -52,37 +189,379 @@ class DigestResponse(BaseModel):
     stories: list[dict]
 
 
-async def generate_digest(force: bool = False) -> DailyDigest:
-    """Generate or return cached/stored digest for today."""
-    today = date.today().isoformat()
+def today_str() -> str:
+    """Today's date in the digest timezone."""
+    return datetime.now(DIGEST_TZ).date().isoformat()
+
+
+def schedule_generation(scheduler: AsyncIOScheduler):
+    """Register the daily generation, intraday refreshes and a startup catch-up."""
+    scheduler.add_job(
+        scheduled_generation,
+        CronTrigger(hour=DIGEST_HOUR, timezone=DIGEST_TZ),
+        id="daily-digest",
+        coalesce=True,
+        misfire_grace_time=3600,
+        replace_existing=True,
+    )
+    if REFRESH_HOURS:
+        scheduler.add_job(
+            scheduled_generation,
+            CronTrigger(hour=",".join(str(h) for h in REFRESH_HOURS), timezone=DIGEST_TZ),
+            kwargs={"force": True},
+            id="intraday-refresh",
+            coalesce=True,
+            misfire_grace_time=600,
+            replace_existing=True,
+        )
+    # Catch up now if today's digest is missing after a restart past DIGEST_HOUR;
+    # before it, the daily job above generates on time
+    if not before_digest_hour():
+        scheduler.add_job(scheduled_generation, id="startup-digest", replace_existing=True)
+
+
+async def backfill_search_index():
+    """Index stored digests the search index doesn't have yet (e.g. copied in or migrated)."""
+    try:
+        result = await asyncio.to_thread(reindex_all, True)
+    except Exception as e:
+        print(f"⚠️ Search index backfill failed: {e}")
+        return
+    if result["indexed"]:
+        print(f"🔎 Indexed {len(result['indexed'])} digests missing from search")
+    for date_str, error in result["failed"].items():
+        print(f"⚠️ Search index skipped {date_str}: {error}")
+
+
+async def scheduled_generation(force: bool = False):
+    """Scheduler entry point: generate without letting errors kill the job."""
+    try:
+        digest = await generate_digest(force=force)
+        print(f"✅ Digest ready for {digest.date}")
+    except Exception as e:
+        print(f"⚠️ Scheduled digest generation failed: {e}")
+        return
+    # Chats that already have today's digest are skipped, so refreshes don't resend
+    delivery = get_delivery()
+    if delivery is not None:
+        statuses = await delivery.deliver(digest)
+        sent = sum(status == "sent" for status in statuses.values())
+        already = sum(status == "already_sent" for status in statuses.values())
+        print(f"📨 Delivered {digest.date} to {sent} chats ({already} already had it)")
+
+
+async def generate_digest(force: bool = False, rank: str | None = None) -> DailyDigest:
+    """Generate or return cached/stored digest for today.
     
-    # Try loading from disk first
-    if not force:
-        existing = load_digest(today)
+    Concurrent callers for the same date share one in-progress generation, and
+    forced refreshes within REFRESH_DEBOUNCE_SECONDS of the last one are coalesced.
+    `rank` overrides HN_DIGEST_RANK for a generation this call starts.
+    """
+    today = today_str()
+    
+    # Try the in-memory cache, then disk
+    if not force or _recently_generated(today):
+        existing = load_cached_digest(today)
         if existing:
-            print(f"📂 Loaded existing digest for {today}")
-            return existing
+            return existing.digest
+    
+    # A disconnecting caller must not cancel the work other callers are waiting on
+    return await asyncio.shield(_start_generation(today, rank))
+
+
+def start_background_refresh(rank: str | None = None) -> bool:
+    """Kick off today's generation without waiting. Returns False if debounced."""
+    today = today_str()
+    if _recently_generated(today) and not _generations.in_flight(today):
+        return False
+    _start_generation(today, rank)
+    return True
+
+
+def _start_generation(today: str, rank: str | None = None) -> asyncio.Task:
+    """Start (or join) today's generation; its progress goes to _progress[today]."""
+    if not _generations.in_flight(today):
+        _progress[today] = EventChannel()
+    channel = _progress[today]
+    return _generations.start(today, lambda: _build_digest(today, channel, rank))
+
+
+def get_summarizer() -> AsyncSummarizer:
+    """The process-wide summarizer; its connection pool lives until shutdown."""
+    global _summarizer
+    if _summarizer is None:
+        _summarizer = create_async_summarizer(
+            summary_cache=SummaryCache(DATA_DIR / "summaries.json")
+        )
+    return _summarizer
+
+
+def get_hn_client() -> HNClient:
+    """The process-wide HN API client, shared by every fetch until shutdown."""
+    global _hn_client
+    if _hn_client is None:
+        _hn_client = HNClient(
+            max_concurrency=int(os.getenv("HN_MAX_CONCURRENCY", "16")),
+            item_cache=ItemCache(DATA_DIR / "items", ttl=parse_ttl(os.getenv("HN_ITEM_TTL"))),
+        )
+    return _hn_client
+
+
+def get_content_fetcher() -> ContentFetcher:
+    """The process-wide article fetcher and its on-disk content cache."""
+    global _content_fetcher
+    if _content_fetcher is None:
+        _content_fetcher = ContentFetcher(cache=ArticleCache(DATA_DIR / "articles"))
+    return _content_fetcher
+
+
+def get_delivery() -> TelegramDelivery | None:
+    """The process-wide Telegram sender, or None when no bot/chats are configured."""
+    global _delivery
+    if _delivery is None and TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_IDS:
+        _delivery = TelegramDelivery(
+            TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_IDS, DATA_DIR / "telegram.json"
+        )
+    return _delivery
+
+
+def _recently_generated(date_str: str) -> bool:
+    finished = _last_generated.get(date_str)
+    return finished is not None and time.monotonic() - finished < REFRESH_DEBOUNCE_SECONDS
+
+
+async def _build_digest(
+    today: str, channel: EventChannel, rank: str | None = None
+) -> DailyDigest:
+    """Fetch, summarize and save one digest. Only ever run through _start_generation.
+    
+    A per-date file lock keeps worker processes from generating the same date
+    at once; a worker that had to wait reuses what the lock holder saved.
+    """
+    lock = FileLock(DATA_DIR / "locks" / f"{today}.lock")
+    started = datetime.utcnow().isoformat()
+    try:
+        digest = None
+        if not lock.try_acquire():
+            print(f"⏳ Another worker is generating {today}, waiting...")
+            channel.emit("progress", {"stage": "waiting", "date": today})
+            await lock.acquire_async()
+            digest = _saved_since(today, started)
+        if digest is not None:
+            _emit_digest(channel, digest)
+        else:
+            digest = await _traced_generation(today, channel, rank)
+    except Exception as e:
+        channel.emit("error", {"detail": str(e)})
+        raise
+    finally:
+        lock.release()
+        channel.close()
+    
+    _last_generated[today] = time.monotonic()
+    return digest
+
+
+def _saved_since(today: str, since: str) -> DailyDigest | None:
+    """Today's stored digest, if another process saved it after `since`."""
+    digest = load_digest(today)
+    if digest is not None and (digest.generated_at or "") >= since:
+        print(f"📂 Reusing digest for {today} generated by another worker")
+        return digest
+    return None
+
+
+async def _traced_generation(
+    today: str, channel: EventChannel, rank: str | None = None
+) -> DailyDigest:
+    """Run one generation, saving its trace when TRACE_GENERATIONS is on."""
+    if not TRACE_GENERATIONS:
+        return await _run_generation(today, channel, rank)
+    
+    trace = Trace(f"generate {today}")
+    try:
+        with activate(trace), span("generate", "stage", date=today):
+            return await _run_generation(today, channel, rank)
+    finally:
+        stamp = datetime.now().strftime("%H%M%S")
+        path = trace.save(TRACE_DIR / f"{today}_{stamp}.json")
+        print(f"🧭 Saved trace to {path}")
+
+
+async def _run_generation(
+    today: str, channel: EventChannel, rank: str | None = None
+) -> DailyDigest:
+    channel.emit("progress", {"stage": "fetching", "date": today})
     
-    # Fetch stories
-    print(f"📡 Fetching HN stories for {today}...")
-    stories = await fetch_top_stories(30)
+    # Fetch stories, unless the poller (which tracks the top feed) already has them resident
+    top_only = list(DIGEST_FEEDS) == ["top"]
+    if top_only and live_stories.is_warm(DIGEST_FEEDS["top"], max_age=POLL_INTERVAL_SECONDS * 3):
+        stories = live_stories.top(DIGEST_FEEDS["top"])
+        print(f"⚡ Using {len(stories)} live stories for {today}")
+    else:
+        print(f"📡 Fetching HN stories ({'/'.join(DIGEST_FEEDS)}) for {today}...")
+        with span("fetch_stories", "stage", feeds=",".join(DIGEST_FEEDS)):
+            stories = await fetch_feeds(DIGEST_FEEDS, client=get_hn_client())
+        # Without the poller, each generation is the only score sample we get
+        score_store.append(stories)
     
     if not stories:
         raise RuntimeError("Failed to fetch stories from HN")
     
     print(f"✅ Got {len(stories)} stories, generating digest...")
     
-    # Summarize
-    summarizer = create_summarizer()
-    digest = summarizer.summarize_stories(stories, max_stories=10)
+    # Fold duplicate submissions together so they don't take several digest slots
+    if DEDUP_STORIES:
+        with span("dedupe", "stage", stories=len(stories)):
+            stories = _dedupe(stories, today)
+    
+    # Pull article text and comment threads for the stories that will make the digest
+    rank_key = ranking_key(stories, rank or RANK_MODE, score_store)
+    selected = select_stories(stories, max_stories=10, key=rank_key)
+    channel.emit("progress", {"stage": "fetched", "stories": len(stories)})
+    articles, comments = await asyncio.gather(
+        _fetch_articles(selected), _crawl_comments(selected)
+    )
+    
+    # Summarize, streaming each story out as its shard comes back
+    channel.emit("progress", {"stage": "summarizing", "stories": len(selected)})
+    with span("summarize", "stage", stories=len(selected)):
+        digest = await get_summarizer().summarize_stories(
+            selected,
+            max_stories=10,
+            date_str=today,
+            articles=articles,
+            on_story=lambda ds: channel.emit("story", story_to_dict(ds)),
+            rank_key=rank_key,
+            comments=comments,
+        )
+    channel.emit("intro", {"intro": digest.intro})
     
     # Save to disk
-    filepath = save_digest(digest)
+    with span("save", "stage"):
+        filepath = save_digest(digest)
     print(f"💾 Saved digest to {filepath}")
-    
+    channel.emit("digest", {**digest_to_dict(digest), "generated_at": digest.generated_at})
     return digest
 
 
+def _dedupe(stories: list, today: str) -> list:
+    result = dedupe_stories(stories, recent_stories(today, DEDUP_DAYS))
+    merged = sum(len(ids) for ids in result.merged.values())
+    STORIES_DEDUPED.inc(merged, reason="duplicate")
+    STORIES_DEDUPED.inc(len(result.seen), reason="already_digested")
+    if merged or result.seen:
+        print(f"🧹 Merged {merged} duplicate(s), skipped {len(result.seen)} already digested")
+    return result.stories
+
+
+async def _fetch_articles(stories: list) -> dict[int, str]:
+    if not FETCH_ARTICLES:
+        return {}
+    with span("fetch_articles", "stage", stories=len(stories)):
+        return await get_content_fetcher().fetch_many(stories)
+
+
+async def _crawl_comments(stories: list) -> dict[int, str]:
+    """Comment digests by story id, crawled within COMMENT_BUDGET and the deadline."""
+    if not FETCH_COMMENTS:
+        return {}
+    crawler = CommentCrawler(
+        get_hn_client(), COMMENT_BUDGET, deadline=COMMENT_DEADLINE_SECONDS
+    )
+    with span("fetch_comments", "stage", stories=len(stories)):
+        crawled = await crawler.crawl_many(stories)
+    return {
+        story_id: comment_digest(c, COMMENT_EXCERPT_CHARS)
+        for story_id, c in crawled.items() if c
+    }
+
+
+def load_cached_digest(date_str: str) -> CachedDigest | None:
+    """Return the rendered digest for a date, loading it from disk on a cache miss."""
+    entry = digest_cache.get(date_str)
+    if entry is None:
+        digest = load_digest(date_str)
+        if digest is None:
+            return None
+        print(f"📂 Loaded digest for {date_str}")
+        entry = digest_cache.put(digest)
+    return entry
+
+
+def load_latest_digest() -> CachedDigest | None:
+    """The most recent readable digest, whatever its date.
+    
+    Unreadable digests are remembered by version, so they are only re-parsed
+    (and reported) again once rewritten.
+    """
+    for date_str in list_digests():
+        if date_str in _unreadable and _unreadable[date_str] == digest_version(date_str):
+            continue
+        try:
+            entry = load_cached_digest(date_str)
+        except (ValueError, KeyError) as e:
+            _unreadable[date_str] = digest_version(date_str)
+            print(f"⚠️ Skipped unreadable digest {date_str}: {type(e).__name__}: {e}")
+            continue
+        _unreadable.pop(date_str, None)
+        if entry:
+            return entry
+    return None
+
+
+def before_digest_hour() -> bool:
+    """Whether today's scheduled generation time is still ahead."""
+    return datetime.now(DIGEST_TZ).hour < DIGEST_HOUR
+
+
+async def get_cached_digest(stale: bool = False) -> CachedDigest:
+    """Today's digest with pre-rendered bodies, generating it if needed.
+    
+    With `stale=True` the most recent previous digest is returned right away
+    and a missing digest is generated in the background - but not before
+    DIGEST_HOUR, when the scheduler does it.
+    """
+    entry = load_cached_digest(today_str())
+    if entry is not None:
+        return entry
+    
+    if stale:
+        previous = load_latest_digest()
+        if previous is not None:
+            if not before_digest_hour():
+                start_background_refresh()
+            return previous
+    
+    digest = await generate_digest()
+    return digest_cache.get(digest.date) or digest_cache.put(digest)
+
+
+def cached_response(
+    request: Request, body: RenderedBody, media_type: str, last_modified: str | None = None
+) -> Response:
+    """Serve a pre-rendered body with ETag / If-None-Match, Last-Modified and gzip support."""
+    use_gzip = accepts_gzip(request.headers.get("accept-encoding"))
+    etag = body.gzip_etag if use_gzip else body.etag
+    headers = {"ETag": etag, "Vary": "Accept-Encoding", "Cache-Control": "no-cache"}
+    if last_modified:
+        headers["Last-Modified"] = last_modified
+    
+    if_none_match = request.headers.get("if-none-match")
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    # If-Modified-Since only counts when the client sent no ETag to compare
+    if not if_none_match and not_modified_since(
+        request.headers.get("if-modified-since"), last_modified
+    ):
+        return Response(status_code=304, headers=headers)
+    
+    if use_gzip:
+        headers["Content-Encoding"] = "gzip"
+        return Response(body.gzipped, media_type=media_type, headers=headers)
+    return Response(body.body, media_type=media_type, headers=headers)
+
+
 @app.get("/")
 async def root():
     return {
@@ -93,65 +572,74 @@ async def root():
             "/digest/markdown": "Get today's digest (Markdown)",
             "/digest/telegram": "Get today's digest (Telegram HTML)",
             "/digest/refresh": "Force refresh today's digest",
+            "/digest/stream": "Stream today's generation (SSE or NDJSON)",
             "/digests": "List all available digests",
+            "/feed.xml": "RSS feed of recent digests (?format=atom for Atom)",
             "/digests/{date}": "Get digest for a specific date",
+            "/digests/export": "Stream stories across dates as NDJSON",
+            "/search?q=": "Search the digest archive",
             "/stats": "Storage statistics",
+            "/metrics": "Prometheus metrics",
+            "/ready": "Readiness (today's digest available)",
         }
     }
 
 
 @app.get("/digest", response_model=DigestResponse)
-async def get_digest():
+async def get_digest(request: Request, stale: bool = True):
     """Get today's digest as JSON."""
     try:
-        digest = await generate_digest()
-        return DigestResponse(
-            date=digest.date,
-            intro=digest.intro,
-            story_count=len(digest.stories),
-            stories=[
-                {
-                    "title": ds.story.title,
-                    "url": ds.story.url or ds.story.hn_url,
-                    "hn_url": ds.story.hn_url,
-                    "score": ds.story.score,
-                    "comments": ds.story.descendants,
-                    "summary_zh": ds.summary_zh,
-                    "category": ds.category,
-                    "importance": ds.importance,
-                }
-                for ds in digest.stories
-            ]
-        )
+        entry = await get_cached_digest(stale=stale)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    return cached_response(request, entry.bodies["json"], "application/json")
 
 
 @app.get("/digest/markdown", response_class=PlainTextResponse)
-async def get_digest_markdown():
+async def get_digest_markdown(request: Request, stale: bool = True):
     """Get today's digest as Markdown."""
     try:
-        digest = await generate_digest()
-        return format_digest_markdown(digest)
+        entry = await get_cached_digest(stale=stale)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    return cached_response(request, entry.bodies["markdown"], "text/plain; charset=utf-8")
 
 
 @app.get("/digest/telegram", response_class=HTMLResponse)
-async def get_digest_telegram():
+async def get_digest_telegram(request: Request, stale: bool = True):
     """Get today's digest formatted for Telegram."""
     try:
-        digest = await generate_digest()
-        return format_digest_telegram(digest)
+        entry = await get_cached_digest(stale=stale)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    return cached_response(request, entry.bodies["telegram"], "text/html; charset=utf-8")
 
 
 @app.post("/digest/refresh")
-async def refresh_digest():
-    """Force refresh today's digest."""
+async def refresh_digest(background: bool = False, rank: str | None = None):
+    """Force refresh today's digest.
+    
+    With `background=true` the refresh runs asynchronously and the current
+    digest (if any) is reported immediately. `rank` (score, velocity or
+    comments) overrides how stories are picked.
+    """
+    if rank is not None and rank not in RANK_MODES:
+        raise HTTPException(
+            status_code=400, detail=f"rank must be one of {', '.join(RANK_MODES)}"
+        )
+    
+    if background:
+        started = start_background_refresh(rank)
+        current = load_latest_digest()
+        return {
+            "success": True,
+            "refreshing": started or _generations.in_flight(today_str()),
+            "date": current.digest.date if current else None,
+            "story_count": len(current.digest.stories) if current else 0,
+        }
+    
     try:
-        digest = await generate_digest(force=True)
+        digest = await generate_digest(force=True, rank=rank)
         return {
             "success": True,
             "date": digest.date,
@@ -161,6 +649,74 @@ async def refresh_digest():
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/digest/stream")
+async def stream_digest(format: str = "sse", force: bool = False):
+    """Stream today's generation as it happens, as SSE or NDJSON.
+    
+    Events: `progress` (stage updates), `story` (one per summary, as soon as
+    it is ready), `intro`, then `digest` (the saved digest) or `error`.
+    Joins a generation already in progress; with nothing to do (today's digest
+    exists and `force` is off, or a forced refresh is debounced) the stored
+    digest is replayed immediately.
+    """
+    if format not in ("sse", "ndjson"):
+        raise HTTPException(status_code=400, detail="format must be 'sse' or 'ndjson'")
+    
+    today = today_str()
+    channel = None
+    if _generations.in_flight(today):
+        channel = _progress[today]
+    elif not force or _recently_generated(today):
+        existing = load_cached_digest(today)
+        if existing:
+            channel = _replay(existing)
+    if channel is None:
+        _start_generation(today)
+        channel = _progress[today]
+    
+    def encode(event: str, data: dict) -> str:
+        payload = json.dumps(data, ensure_ascii=False)
+        if format == "sse":
+            return f"event: {event}\ndata: {payload}\n\n"
+        return json.dumps({"event": event, "data": data}, ensure_ascii=False) + "\n"
+    
+    async def events():
+        async for event, data in channel.subscribe():
+            yield encode(event, data)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream" if format == "sse" else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _replay(entry: CachedDigest) -> EventChannel:
+    """A closed channel carrying an already stored digest, in stream-event form."""
+    channel = EventChannel()
+    channel.emit("progress", {"stage": "cached", "date": entry.digest.date})
+    _emit_digest(channel, entry.digest)
+    channel.close()
+    return channel
+
+
+def _emit_digest(channel: EventChannel, digest: DailyDigest):
+    for ds in digest.stories:
+        channel.emit("story", story_to_dict(ds))
+    channel.emit("intro", {"intro": digest.intro})
+    channel.emit("digest", {**digest_to_dict(digest), "generated_at": digest.generated_at})
+
+
+@app.get("/feed.xml")
+async def get_feed(request: Request, format: str = "rss"):
+    """The last digests as an RSS 2.0 (default) or Atom feed; served from memory."""
+    if format not in FEED_KINDS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {FEED_KINDS}")
+    body, last_modified = feed_cache.get(format)
+    media_type = "application/rss+xml" if format == "rss" else "application/atom+xml"
+    return cached_response(request, body, f"{media_type}; charset=utf-8", last_modified)
+
+
 @app.get("/digests")
 async def get_digest_list(limit: int = 30):
     """List available digests by date."""
@@ -168,31 +724,94 @@ async def get_digest_list(limit: int = 30):
     return {"digests": dates, "count": len(dates)}
 
 
-@app.get("/digests/{date_str}")
-async def get_digest_by_date(date_str: str):
+@app.get("/digests/export")
+async def export_digests(
+    request: Request,
+    date_from: str | None = Query(None, alias="from"),
+    date_to: str | None = Query(None, alias="to"),
+    category: str | None = None,
+    min_importance: int | None = None,
+    cursor: str | None = None,
+    limit: int = EXPORT_PAGE_SIZE,
+):
+    """Stream stored stories across a date range as NDJSON, oldest first.
+    
+    One JSON object per story. If more stories match than `limit`, the last
+    line is `{"next_cursor": "..."}`; pass it back as `cursor` for the next
+    page. Storage is read one day (or batch) at a time, so memory stays flat
+    however long the range. Gzipped when the client accepts it.
+    """
+    try:
+        after = parse_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {cursor!r}")
+    limit = max(1, min(limit, EXPORT_MAX_PAGE_SIZE))
+    
+    def lines():
+        stories = iter_stories(date_from, date_to, category, min_importance, after)
+        chunk, size, last = [], 0, None
+        try:
+            for n, record in enumerate(stories):
+                if n == limit:
+                    chunk.append(json.dumps({"next_cursor": make_cursor(last)}) + "\n")
+                    break
+                line = json.dumps(record, ensure_ascii=False) + "\n"
+                chunk.append(line)
+                size += len(line)
+                last = record
+                # Batch lines: each chunk is one hop through the threadpool
+                if size >= EXPORT_CHUNK_BYTES:
+                    yield "".join(chunk).encode("utf-8")
+                    chunk, size = [], 0
+        finally:
+            stories.close()
+        if chunk:
+            yield "".join(chunk).encode("utf-8")
+    
+    headers = {"Vary": "Accept-Encoding"}
+    body = lines()
+    if accepts_gzip(request.headers.get("accept-encoding")):
+        headers["Content-Encoding"] = "gzip"
+        body = _gzip_stream(body)
+    return StreamingResponse(body, media_type="application/x-ndjson", headers=headers)
+
+
+def _gzip_stream(chunks):
+    """Compress a byte stream incrementally into a single gzip member."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+@app.get("/digests/{date_str}", response_model=DigestResponse)
+async def get_digest_by_date(date_str: str, request: Request):
     """Get digest for a specific date."""
-    digest = load_digest(date_str)
-    if not digest:
+    entry = load_cached_digest(date_str)
+    if not entry:
         raise HTTPException(status_code=404, detail=f"No digest found for {date_str}")
     
-    return DigestResponse(
-        date=digest.date,
-        intro=digest.intro,
-        story_count=len(digest.stories),
-        stories=[
-            {
-                "title": ds.story.title,
-                "url": ds.story.url or ds.story.hn_url,
-                "hn_url": ds.story.hn_url,
-                "score": ds.story.score,
-                "comments": ds.story.descendants,
-                "summary_zh": ds.summary_zh,
-                "category": ds.category,
-                "importance": ds.importance,
-            }
-            for ds in digest.stories
-        ]
+    return cached_response(request, entry.bodies["json"], "application/json")
+
+
+@app.get("/search")
+async def search_archive(
+    q: str,
+    date_from: str | None = None,
+    date_to: str | None = None,
+    category: str | None = None,
+    limit: int = 20,
+    offset: int = 0,
+):
+    """Full-text search over titles, URLs, summaries and intros of all digests."""
+    limit = max(1, min(limit, 100))
+    result = get_search_index().search(
+        q, date_from=date_from, date_to=date_to, category=category,
+        limit=limit, offset=max(0, offset),
     )
+    return {**result, "limit": limit, "offset": max(0, offset)}
 
 
 @app.get("/stats")
@@ -201,6 +820,30 @@ async def get_storage_stats():
     return get_stats()
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Prometheus metrics for this worker process."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/ready")
+async def ready():
+    """Readiness: 200 while any digest can be served, 503 only when there is none.
+    
+    `serving` is the date being served (an older one until today's exists) and
+    `generating` whether today's generation is running.
+    """
+    today = today_str()
+    latest = load_latest_digest()
+    content = {
+        "ready": latest is not None,
+        "date": today,
+        "generating": _generations.in_flight(today),
+        "serving": latest.digest.date if latest else None,
+    }
+    return JSONResponse(status_code=200 if latest else 503, content=content)
+
+
 @app.get("/health")
 async def health():
     return {"status": "ok", "timestamp": datetime.utcnow().isoformat()}
@@ -0,0 +1,194 @@
+"""
+Metrics - minimal in-process counters and histograms in Prometheus text format
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+# Seconds; spans cached lookups through slow LLM calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+REGISTRY: list["_Metric"] = []
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(pairs: list[tuple[str, str]]) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labels)
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels: dict) -> tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _pairs(self, key: tuple[str, ...]) -> list[tuple[str, str]]:
+        return list(zip(self.labelnames, key))
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """A monotonically increasing value per label set."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        super().__init__(name, help, labels)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self._pairs(key))} {_format_value(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    """Observations counted into cumulative buckets per label set."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series: dict[tuple[str, ...], list] = {}  # key -> [bucket counts, sum, count]
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the block; the yielded dict can adjust labels."""
+        labels = dict(labels)
+        start = time.perf_counter()
+        try:
+            yield labels
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        with self._lock:
+            items = sorted((k, (list(s[0]), s[1], s[2])) for k, s in self._series.items())
+        for key, (counts, total, count) in items:
+            pairs = self._pairs(key)
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts + [count - sum(counts)]):
+                cumulative += n
+                bucket = _format_labels(pairs + [("le", _format_value(bound))])
+                lines.append(f"{self.name}_bucket{bucket} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(pairs)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(pairs)} {count}")
+        return lines
+
+
+def render_metrics() -> str:
+    """Every registered metric in the Prometheus text exposition format."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# HN API
+HN_LIST_SECONDS = Histogram(
+    "hn_list_fetch_seconds", "Latency of fetching a feed's story id list.", ("feed",)
+)
+HN_ITEM_SECONDS = Histogram(
+    "hn_item_fetch_seconds", "Latency of fetch_story per item, by where it came from.",
+    ("source",),
+)
+HN_ITEMS_DROPPED = Counter(
+    "hn_items_dropped_total", "Items that did not become stories.", ("reason",)
+)
+STORIES_DEDUPED = Counter(
+    "stories_deduplicated_total",
+    "Candidates merged into a duplicate or skipped as already digested.",
+    ("reason",),
+)
+
+# Articles
+ARTICLE_SECONDS = Histogram(
+    "article_fetch_seconds", "Latency of fetching one article's text, by outcome.", ("result",)
+)
+
+# Gemini
+GEMINI_SECONDS = Histogram(
+    "gemini_request_seconds", "Latency of each Gemini HTTP request attempt.", ("status",)
+)
+GEMINI_TOKENS = Counter(
+    "gemini_tokens_total", "Gemini token usage reported in usageMetadata.", ("type",)
+)
+LLM_STORY_ITEMS = Counter(
+    "llm_story_items_total", "Story summaries expected from Gemini, by outcome.", ("result",)
+)
+
+# Delivery
+TELEGRAM_MESSAGES = Counter(
+    "telegram_messages_total", "Telegram sendMessage attempts by outcome.", ("result",)
+)
+
+# Parsing and storage
+JSON_PARSE_SECONDS = Histogram(
+    "json_parse_seconds", "Time spent parsing JSON documents.", ("source",)
+)
+STORAGE_SECONDS = Histogram(
+    "storage_seconds", "Latency of digest storage reads and writes.", ("op", "backend")
+)
+
+# Shared
+RETRIES = Counter("retries_total", "Retried upstream requests.", ("client",))
+CACHE_REQUESTS = Counter(
+    "cache_requests_total", "Cache lookups by cache and result.", ("cache", "result")
+)
+HTTP_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "API latency per route, until response headers are sent.",
+    ("method", "route", "status"),
+)
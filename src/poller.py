@@ -0,0 +1,98 @@
+"""
+Change-feed poller - keep a live set of top stories warm in the background
+"""
+import asyncio
+import time
+from datetime import datetime, timezone
+
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+
+from .scores import ScoreStore
+from .scraper import HNClient, Story
+
+
+class LiveStorySet:
+    """The current top story ids and the resident Story for each of them."""
+
+    def __init__(self):
+        self.top_ids: list[int] = []
+        self.stories: dict[int, Story] = {}
+        self.updated_at: float | None = None
+
+    def update(self, top_ids: list[int], fetched: list[Story]):
+        keep = set(top_ids)
+        stories = {sid: s for sid, s in self.stories.items() if sid in keep}
+        stories.update((s.id, s) for s in fetched)
+        # Swap in whole objects so readers never see a half-applied poll
+        self.stories = stories
+        self.top_ids = top_ids
+        self.updated_at = time.time()
+
+    def is_warm(self, limit: int, max_age: float) -> bool:
+        """Whether the first `limit` top stories are resident and recently polled."""
+        if self.updated_at is None or time.time() - self.updated_at > max_age:
+            return False
+        return len(self.top_ids) >= limit and all(
+            sid in self.stories for sid in self.top_ids[:limit]
+        )
+
+    def top(self, limit: int) -> list[Story]:
+        """Resident top stories in rank order."""
+        stories = self.stories
+        return [stories[sid] for sid in self.top_ids[:limit] if sid in stories]
+
+
+class StoryPoller:
+    """Poll topstories.json + updates.json and fetch only new or changed items."""
+
+    def __init__(
+        self,
+        client: HNClient,
+        live: LiveStorySet,
+        track: int = 60,
+        interval: float = 120,
+        scores: ScoreStore | None = None,
+    ):
+        self.client = client
+        self.live = live
+        self.track = track
+        self.interval = interval
+        self.scores = scores
+        self.polls = 0
+
+    async def poll(self):
+        top_ids, updates = await asyncio.gather(
+            self.client.fetch_ids("top", self.track),
+            self.client.fetch_updates(),
+        )
+        tracked = set(top_ids)
+        changed = tracked & set(updates.get("items", []))
+        new = tracked - set(self.live.stories)
+
+        # New ids may be served from the item cache; changed ones must hit the API
+        fresh, refreshed = await asyncio.gather(
+            self.client.fetch_stories(sorted(new - changed)),
+            self.client.fetch_stories(sorted(changed), refresh=True),
+        )
+        failed = {**fresh.failed, **refreshed.failed}
+        if failed:
+            print(f"⚠️ Poller failed to fetch {len(failed)} items: {sorted(failed)}")
+
+        self.live.update(top_ids, fresh.stories + refreshed.stories)
+        if self.scores is not None:
+            # One snapshot of every tracked story per poll, changed or not
+            self.scores.append(self.live.top(self.track))
+        self.polls += 1
+
+    def start(self, scheduler: AsyncIOScheduler):
+        """Register the poll job; the first poll runs immediately."""
+        scheduler.add_job(
+            self.poll,
+            "interval",
+            seconds=self.interval,
+            id="hn-poller",
+            next_run_time=datetime.now(timezone.utc),
+            max_instances=1,
+            coalesce=True,
+            replace_existing=True,
+        )
@@ -0,0 +1,198 @@
+"""
+Story score time series - append-only fixed-width snapshots and velocity ranking
+"""
+import mmap
+import os
+import struct
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable
+
+from .scraper import Story
+
+try:
+    import numpy as np
+except ImportError:  # optional: pip install numpy; falls back to pure Python
+    np = None
+
+# One snapshot: story id, unix time, score, comment count (little-endian, 16 bytes)
+RECORD = struct.Struct("<IIii")
+if np is not None:
+    RECORD_DTYPE = np.dtype(
+        [("id", "<u4"), ("ts", "<u4"), ("score", "<i4"), ("descendants", "<i4")]
+    )
+
+RANK_MODES = ("score", "velocity", "comments")
+
+# Velocity is measured over this trailing window...
+DEFAULT_WINDOW = 6 * 3600
+# ...and only trusted once a story's samples span at least this long
+MIN_SPAN = 15 * 60
+# Day files older than this are deleted; a few days comfortably covers the window
+RETENTION_DAYS = 3
+
+
+class ScoreStore:
+    """Score/comment snapshots per story, one append-only file of fixed-width records per day.
+
+    Files can be memory-mapped as a flat record array. Appends are single
+    O_APPEND writes, so concurrent writers interleave whole records. Starting
+    a new day's file deletes those older than `retention_days`.
+    """
+
+    def __init__(self, root: Path, retention_days: int = RETENTION_DAYS):
+        self.root = Path(root)
+        self.retention_days = retention_days
+
+    def _path(self, day: str) -> Path:
+        return self.root / f"{day}.bin"
+
+    def append(self, stories: list[Story], ts: float | None = None) -> int:
+        """Record the current score and comment count of each story. Returns the count."""
+        if not stories:
+            return 0
+        ts = int(ts if ts is not None else time.time())
+        day = datetime.fromtimestamp(ts, timezone.utc).date().isoformat()
+        data = b"".join(RECORD.pack(s.id, ts, s.score, s.descendants) for s in stories)
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self._path(day)
+        new_day = not path.exists()
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, data)
+        finally:
+            os.close(fd)
+        if new_day:
+            self.prune(ts)
+        return len(stories)
+
+    def prune(self, now: float | None = None) -> list[str]:
+        """Delete day files older than the retention period. Returns the days removed."""
+        now = now if now is not None else time.time()
+        today = datetime.fromtimestamp(now, timezone.utc).date()
+        cutoff = datetime.fromordinal(today.toordinal() - self.retention_days).date().isoformat()
+        removed = []
+        for path in self.root.glob("*.bin"):
+            if path.stem < cutoff:
+                path.unlink(missing_ok=True)
+                removed.append(path.stem)
+        if removed:
+            print(f"🧹 Pruned {len(removed)} old score files")
+        return sorted(removed)
+
+    def _days(self, since: float, until: float) -> list[str]:
+        start = datetime.fromtimestamp(since, timezone.utc).date()
+        end = datetime.fromtimestamp(until, timezone.utc).date()
+        return [
+            datetime.fromordinal(d).date().isoformat()
+            for d in range(start.toordinal(), end.toordinal() + 1)
+        ]
+
+    def _read(self, path: Path) -> "np.ndarray | list[tuple] | None":
+        """All complete records of one file (a torn trailing write is ignored)."""
+        try:
+            size = path.stat().st_size
+        except OSError:
+            return None
+        count = size // RECORD.size
+        if count == 0:
+            return None
+        if np is not None:
+            return np.memmap(path, dtype=RECORD_DTYPE, mode="r", shape=(count,))
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return list(RECORD.iter_unpack(mm[: count * RECORD.size]))
+
+    def velocities(
+        self,
+        story_ids: list[int],
+        window: float = DEFAULT_WINDOW,
+        now: float | None = None,
+    ) -> dict[int, tuple[float, float]]:
+        """(points per hour, comments per hour) over the window, for stories sampled enough."""
+        now = now if now is not None else time.time()
+        since = now - window
+        chunks = [self._read(self._path(day)) for day in self._days(since, now)]
+        chunks = [c for c in chunks if c is not None]
+        if not chunks or not story_ids:
+            return {}
+        if np is not None:
+            return _velocities_numpy(np.concatenate(chunks), story_ids, since)
+        return _velocities_python([r for c in chunks for r in c], story_ids, since)
+
+
+def _velocities_numpy(records, story_ids: list[int], since: float) -> dict:
+    records = records[(records["ts"] >= since) & np.isin(records["id"], story_ids)]
+    if len(records) == 0:
+        return {}
+    records = records[np.lexsort((records["ts"], records["id"]))]
+    ids, first = np.unique(records["id"], return_index=True)
+    last = np.append(first[1:], len(records)) - 1
+
+    span = (records["ts"][last].astype(np.float64) - records["ts"][first]) / 3600
+    points = records["score"][last].astype(np.float64) - records["score"][first]
+    comments = (
+        records["descendants"][last].astype(np.float64) - records["descendants"][first]
+    )
+    ok = span >= MIN_SPAN / 3600
+    span = np.where(ok, span, 1.0)
+    return {
+        int(i): (float(p), float(c))
+        for i, p, c in zip(ids[ok], (points / span)[ok], (comments / span)[ok])
+    }
+
+
+def _velocities_python(records: list[tuple], story_ids: list[int], since: float) -> dict:
+    wanted = set(story_ids)
+    bounds: dict[int, list[tuple]] = {}
+    for record in records:
+        story_id, ts = record[0], record[1]
+        if ts < since or story_id not in wanted:
+            continue
+        seen = bounds.get(story_id)
+        if seen is None:
+            bounds[story_id] = [record, record]
+        elif ts < seen[0][1]:
+            seen[0] = record
+        elif ts >= seen[1][1]:
+            seen[1] = record
+
+    result = {}
+    for story_id, (first, last) in bounds.items():
+        span = last[1] - first[1]
+        if span >= MIN_SPAN:
+            hours = span / 3600
+            result[story_id] = ((last[2] - first[2]) / hours, (last[3] - first[3]) / hours)
+    return result
+
+
+def ranking_key(
+    stories: list[Story],
+    mode: str = "score",
+    store: ScoreStore | None = None,
+    window: float = DEFAULT_WINDOW,
+    now: float | None = None,
+) -> Callable[[Story], float] | None:
+    """Sort key for `select_stories` under a ranking mode; None means plain score.
+
+    Stories without enough snapshots fall back to their lifetime average rate
+    (score or comments divided by hours since posting).
+    """
+    if mode not in RANK_MODES:
+        raise ValueError(f"Unknown ranking mode {mode!r}, expected one of {RANK_MODES}")
+    if mode == "score":
+        return None
+
+    now = now if now is not None else time.time()
+    measured = store.velocities([s.id for s in stories], window, now) if store else {}
+    column = 0 if mode == "velocity" else 1
+
+    def key(s: Story) -> float:
+        rates = measured.get(s.id)
+        if rates is None:
+            hours = max((now - s.time.timestamp()) / 3600, 1.0)
+            rates = (s.score / hours, s.descendants / hours)
+        return rates[column]
+
+    return key
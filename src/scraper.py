@@ -1,12 +1,42 @@
 """
 HN Scraper - Fetch top stories from Hacker News API
 """
+import os
+import re
+import html
 import asyncio
-from dataclasses import dataclass
+import random
+from dataclasses import dataclass, field
 from datetime import datetime
 import httpx
 
-HN_API_BASE = "https://hacker-news.firebaseio.com/v0"
+from .item_cache import ItemCache
+from .metrics import CACHE_REQUESTS, HN_ITEM_SECONDS, HN_ITEMS_DROPPED, HN_LIST_SECONDS, RETRIES
+from .tracing import span
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+HN_API_BASE = os.getenv("HN_API_BASE", "https://hacker-news.firebaseio.com/v0")
+
+FEEDS = {
+    "top": "topstories",
+    "best": "beststories",
+    "new": "newstories",
+    "show": "showstories",
+    "ask": "askstories",
+}
+
+# Transient HN API responses worth retrying
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+RETRY_BASE_DELAY = 0.25
+RETRY_MAX_DELAY = 5.0
+
+# Longest single comment kept in a comment digest
+COMMENT_LINE_CHARS = 280
 
 
 @dataclass
@@ -19,6 +49,10 @@ class Story:
     time: datetime
     descendants: int  # comment count
     text: str | None = None  # for Ask HN / Show HN
+    # Feed name -> 1-based rank there, for stories fetched by feed
+    feeds: dict[str, int] = field(default_factory=dict)
+    kids: list[int] = field(default_factory=list)  # top-level comment ids, in HN's rank order
+    duplicates: list[int] = field(default_factory=list)  # ids of submissions merged into this one
 
     @property
     def hn_url(self) -> str:
@@ -33,69 +67,353 @@ class Story:
         return self.title.startswith("Show HN:")
 
 
-async def fetch_story(client: httpx.AsyncClient, story_id: int) -> Story | None:
-    """Fetch a single story by ID."""
-    try:
-        resp = await client.get(f"{HN_API_BASE}/item/{story_id}.json")
-        resp.raise_for_status()
-        data = resp.json()
+@dataclass
+class Comment:
+    id: int
+    parent: int
+    depth: int  # 1 = top-level
+    by: str
+    text: str  # plain text
+
+
+@dataclass
+class CrawlBudget:
+    """Limits on one story's comment crawl."""
+    max_nodes: int = 30
+    max_depth: int = 2
+    max_bytes: int = 12_000  # comment text, UTF-8
+    max_top_level: int = 10  # leave room for replies on big threads
+    max_replies: int = 3  # per comment
+
+
+@dataclass
+class FetchResult:
+    stories: list[Story]  # in the order the ids were requested
+    failed: dict[int, str] = field(default_factory=dict)  # item id -> last error
+
+
+def parse_story(data: dict | None) -> Story | None:
+    """Build a Story from an HN item payload, or None if it isn't a live story."""
+    if not data or data.get("type") != "story" or data.get("dead") or data.get("deleted"):
+        return None
+    
+    return Story(
+        id=data["id"],
+        title=data.get("title", ""),
+        url=data.get("url"),
+        score=data.get("score", 0),
+        by=data.get("by", "unknown"),
+        time=datetime.fromtimestamp(data.get("time", 0)),
+        descendants=data.get("descendants", 0),
+        text=data.get("text"),
+        kids=data.get("kids", []),
+    )
+
+
+class HNClient:
+    """Shared HN API client: one keep-alive pool, bounded concurrency, retries."""
+    
+    def __init__(
+        self,
+        base_url: str = HN_API_BASE,
+        max_concurrency: int = 16,
+        max_retries: int = 3,
+        timeout: float = 10.0,
+        http2: bool = True,
+        item_cache: ItemCache | None = None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.max_retries = max_retries
+        self.item_cache = item_cache
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._client = httpx.AsyncClient(
+            timeout=httpx.Timeout(timeout, connect=5.0),
+            limits=httpx.Limits(
+                max_connections=max_concurrency,
+                max_keepalive_connections=max_concurrency,
+            ),
+            http2=http2 and HTTP2_AVAILABLE,
+        )
+    
+    async def __aenter__(self) -> "HNClient":
+        return self
+    
+    async def __aexit__(self, *exc):
+        await self.aclose()
+    
+    async def aclose(self):
+        await self._client.aclose()
+    
+    async def _get_json(self, path: str):
+        """GET a JSON document, retrying transient failures with jittered backoff."""
+        attempt = 0
+        while True:
+            try:
+                async with self._semaphore:
+                    with span(f"hn {path}", "hn", attempt=attempt) as args:
+                        resp = await self._client.get(f"{self.base_url}/{path}")
+                        args.update(status=resp.status_code, bytes=len(resp.content))
+                if resp.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                    resp.raise_for_status()
+                    return resp.json()
+            except httpx.TransportError:
+                if attempt == self.max_retries:
+                    raise
+            # Full jitter keeps retries from a burst of failures from re-synchronizing
+            backoff = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt)
+            await asyncio.sleep(random.uniform(0, backoff))
+            attempt += 1
+            RETRIES.inc(client="hn")
+    
+    async def fetch_ids(self, feed: str, limit: int | None = None) -> list[int]:
+        """Fetch the story id list of a feed (top, best, show, ask, new)."""
+        with HN_LIST_SECONDS.time(feed=feed):
+            ids = await self._get_json(f"{FEEDS[feed]}.json")
+        return ids[:limit] if limit is not None else ids
+    
+    async def fetch_item(self, item_id: int, refresh: bool = False) -> dict | None:
+        """Fetch a raw item payload. Raises once retries are exhausted.
         
-        if not data or data.get("type") != "story" or data.get("dead") or data.get("deleted"):
-            return None
+        With an item cache, items whose volatile fields are still fresh are
+        served locally; `refresh=True` always goes to the network.
+        """
+        with HN_ITEM_SECONDS.time(source="cache") as labels:
+            cache = self.item_cache
+            if cache is not None and not refresh:
+                cached = cache.lookup(item_id)
+                if cached is not None:
+                    return cached
+            
+            labels["source"] = "network"
+            try:
+                data = await self._get_json(f"item/{item_id}.json")
+            except (httpx.HTTPError, ValueError):
+                # Stale metrics beat a missing story
+                stale = cache.get(item_id) if cache is not None else None
+                if stale is None:
+                    labels["source"] = "error"
+                    raise
+                labels["source"] = "stale"
+                return stale.item
+            
+            if cache is not None and data is not None:
+                cache.put(item_id, data)
+            return data
+    
+    async def fetch_comment(self, comment_id: int) -> dict | None:
+        """Fetch a comment item, trusting any cached copy: comments barely change."""
+        cache = self.item_cache
+        if cache is not None:
+            entry = cache.get(comment_id)
+            CACHE_REQUESTS.inc(cache="comment", result="miss" if entry is None else "hit")
+            if entry is not None:
+                return entry.item
         
-        return Story(
-            id=data["id"],
-            title=data.get("title", ""),
-            url=data.get("url"),
-            score=data.get("score", 0),
-            by=data.get("by", "unknown"),
-            time=datetime.fromtimestamp(data.get("time", 0)),
-            descendants=data.get("descendants", 0),
-            text=data.get("text"),
+        data = await self._get_json(f"item/{comment_id}.json")
+        if cache is not None and data is not None:
+            cache.put(comment_id, data)
+        return data
+    
+    async def fetch_updates(self) -> dict:
+        """Fetch the change feed: recently changed item ids and profiles."""
+        return await self._get_json("updates.json") or {}
+    
+    async def fetch_story(self, story_id: int, refresh: bool = False) -> Story | None:
+        """Fetch a single story by ID."""
+        return parse_story(await self.fetch_item(story_id, refresh=refresh))
+    
+    async def fetch_stories(self, story_ids: list[int], refresh: bool = False) -> FetchResult:
+        """Fetch many stories concurrently, keeping id order and reporting failures."""
+        results = await asyncio.gather(
+            *(self.fetch_story(sid, refresh=refresh) for sid in story_ids),
+            return_exceptions=True,
         )
-    except Exception:
-        return None
+        
+        stories, failed = [], {}
+        for sid, result in zip(story_ids, results):
+            if isinstance(result, Exception):
+                failed[sid] = f"{type(result).__name__}: {result}"
+                HN_ITEMS_DROPPED.inc(reason="error")
+            elif result is None:
+                HN_ITEMS_DROPPED.inc(reason="not_story")
+            else:
+                stories.append(result)
+        return FetchResult(stories=stories, failed=failed)
+    
+    async def fetch_feed(self, feed: str, limit: int = 30) -> FetchResult:
+        """Fetch the first `limit` stories of a feed."""
+        return await self.fetch_feeds({feed: limit})
+    
+    async def fetch_feeds(self, limits: dict[str, int]) -> FetchResult:
+        """Fetch several feeds at once, fetching each story they share only once.
+        
+        `limits` maps feed name to how many of its stories to take. Stories come
+        back in order of first appearance (feeds in the given order), tagged with
+        every feed they appeared in and their rank there. A feed whose id list
+        can't be fetched is skipped unless all of them fail.
+        """
+        id_lists = await asyncio.gather(
+            *(self.fetch_ids(feed, limit) for feed, limit in limits.items()),
+            return_exceptions=True,
+        )
+        errors = [ids for ids in id_lists if isinstance(ids, BaseException)]
+        if errors and len(errors) == len(id_lists):
+            raise errors[0]
+        
+        ranks: dict[int, dict[str, int]] = {}
+        for feed, ids in zip(limits, id_lists):
+            if isinstance(ids, BaseException):
+                print(f"⚠️ Failed to fetch {feed} feed: {ids}")
+                continue
+            for rank, item_id in enumerate(ids, 1):
+                ranks.setdefault(item_id, {})[feed] = rank
+        
+        result = await self.fetch_stories(list(ranks))
+        for story in result.stories:
+            story.feeds = ranks[story.id]
+        return result
 
 
-async def fetch_top_stories(limit: int = 30) -> list[Story]:
-    """Fetch top N stories from HN."""
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        # Get top story IDs
-        resp = await client.get(f"{HN_API_BASE}/topstories.json")
-        resp.raise_for_status()
-        story_ids = resp.json()[:limit]
-        
-        # Fetch stories in parallel
-        tasks = [fetch_story(client, sid) for sid in story_ids]
-        results = await asyncio.gather(*tasks)
+def comment_text(html_text: str | None) -> str:
+    """Plain text of an HN comment's HTML."""
+    if not html_text:
+        return ""
+    text = re.sub(r"<p>", "\n", html_text)
+    text = re.sub(r"<[^>]+>", "", text)
+    return html.unescape(text).strip()
+
+
+class CommentCrawler:
+    """Breadth-first crawl of stories' comment trees over the shared HNClient.
+    
+    Each story is capped by a CrawlBudget; `max_concurrency` caps comment
+    fetches across all stories, and `deadline` bounds the whole crawl, after
+    which whatever has been collected is returned.
+    """
+    
+    def __init__(
+        self,
+        client: HNClient,
+        budget: CrawlBudget | None = None,
+        max_concurrency: int = 32,
+        deadline: float = 10.0,
+    ):
+        self.client = client
+        self.budget = budget or CrawlBudget()
+        self.deadline = deadline
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+    
+    async def _fetch(self, comment_id: int) -> dict | None:
+        async with self._semaphore:
+            return await self.client.fetch_comment(comment_id)
+    
+    async def crawl(self, story: Story, out: list[Comment]):
+        """Append the story's comments to `out`, level by level, until a budget runs out."""
+        budget = self.budget
+        frontier = [(kid, story.id) for kid in story.kids[: budget.max_top_level]]
+        depth, size = 1, 0
+        while frontier and depth <= budget.max_depth and len(out) < budget.max_nodes:
+            # Siblings are in HN's rank order, so a cut keeps the best-ranked ones
+            batch = frontier[: budget.max_nodes - len(out)]
+            items = await asyncio.gather(
+                *(self._fetch(comment_id) for comment_id, _ in batch), return_exceptions=True
+            )
+            frontier = []
+            for (comment_id, parent), item in zip(batch, items):
+                if isinstance(item, Exception) or not item:
+                    continue
+                if item.get("deleted") or item.get("dead"):
+                    continue
+                text = comment_text(item.get("text"))
+                size += len(text.encode("utf-8"))
+                if size > budget.max_bytes:
+                    return
+                out.append(Comment(comment_id, parent, depth, item.get("by", "unknown"), text))
+                replies = item.get("kids", [])[: budget.max_replies]
+                frontier.extend((kid, comment_id) for kid in replies)
+            depth += 1
+    
+    async def crawl_many(self, stories: list[Story]) -> dict[int, list[Comment]]:
+        """Comments per story id; partial for stories still crawling at the deadline."""
+        results: dict[int, list[Comment]] = {s.id: [] for s in stories}
+        tasks = [asyncio.ensure_future(self.crawl(s, results[s.id])) for s in stories]
+        if not tasks:
+            return results
         
-        return [s for s in results if s is not None]
+        done, pending = await asyncio.wait(tasks, timeout=self.deadline)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        if pending:
+            print(f"⚠️ Comment crawl hit its {self.deadline}s deadline, {len(pending)} partial")
+        for task in done:
+            if task.exception() is not None:
+                print(f"⚠️ Comment crawl failed: {task.exception()}")
+        return results
 
 
-async def fetch_best_stories(limit: int = 30) -> list[Story]:
+def comment_digest(comments: list[Comment], max_chars: int = 1200) -> str:
+    """A compact, thread-ordered digest of crawled comments for the summarizer."""
+    children: dict[int, list[Comment]] = {}
+    for c in comments:
+        children.setdefault(c.parent, []).append(c)
+    ids = {c.id for c in comments}
+    # Pre-order walk so replies sit under their parent
+    stack = [c for c in reversed(comments) if c.parent not in ids]
+    lines, used = [], 0
+    while stack:
+        c = stack.pop()
+        text = " ".join(c.text.split())[:COMMENT_LINE_CHARS]
+        line = f"{'  ' * (c.depth - 1)}- {c.by}: {text}"
+        if used + len(line) > max_chars:
+            break
+        lines.append(line)
+        used += len(line) + 1
+        stack.extend(reversed(children.get(c.id, [])))
+    return "\n".join(lines)
+
+
+def parse_feeds(spec: str) -> dict[str, int]:
+    """Parse a feed spec like "top:30,best:10,show,ask" (limit defaults to 30)."""
+    limits = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        feed, _, limit = part.partition(":")
+        if feed not in FEEDS:
+            raise ValueError(f"Unknown feed {feed!r}, expected one of {', '.join(FEEDS)}")
+        limits[feed] = int(limit) if limit else 30
+    return limits
+
+
+async def fetch_feeds(limits: dict[str, int], client: HNClient | None = None) -> list[Story]:
+    """Fetch stories from several feeds, each shared story once (see HNClient.fetch_feeds)."""
+    if client is None:
+        async with HNClient() as own_client:
+            return await fetch_feeds(limits, own_client)
+    
+    result = await client.fetch_feeds(limits)
+    if result.failed:
+        feeds = "/".join(limits)
+        print(f"⚠️ Failed to fetch {len(result.failed)} {feeds} items: {sorted(result.failed)}")
+    return result.stories
+
+
+async def _fetch_feed_stories(feed: str, limit: int, client: HNClient | None) -> list[Story]:
+    return await fetch_feeds({feed: limit}, client)
+
+
+async def fetch_top_stories(limit: int = 30, client: HNClient | None = None) -> list[Story]:
+    """Fetch top N stories from HN."""
+    return await _fetch_feed_stories("top", limit, client)
+
+
+async def fetch_best_stories(limit: int = 30, client: HNClient | None = None) -> list[Story]:
     """Fetch best stories (higher quality threshold)."""
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        resp = await client.get(f"{HN_API_BASE}/beststories.json")
-        resp.raise_for_status()
-        story_ids = resp.json()[:limit]
-        
-        tasks = [fetch_story(client, sid) for sid in story_ids]
-        results = await asyncio.gather(*tasks)
-        
-        return [s for s in results if s is not None]
+    return await _fetch_feed_stories("best", limit, client)
 
 
-async def fetch_show_hn(limit: int = 15) -> list[Story]:
+async def fetch_show_hn(limit: int = 15, client: HNClient | None = None) -> list[Story]:
     """Fetch Show HN stories."""
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        resp = await client.get(f"{HN_API_BASE}/showstories.json")
-        resp.raise_for_status()
-        story_ids = resp.json()[:limit]
-        
-        tasks = [fetch_story(client, sid) for sid in story_ids]
-        results = await asyncio.gather(*tasks)
-        
-        return [s for s in results if s is not None]
+    return await _fetch_feed_stories("show", limit, client)
 
 
 if __name__ == "__main__":
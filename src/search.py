@@ -0,0 +1,214 @@
+"""
+Full-text search over the digest archive - incrementally maintained inverted index
+"""
+import math
+import re
+import sqlite3
+import threading
+from collections import Counter
+from pathlib import Path
+
+from .summarizer import DailyDigest
+
+# Latin words/numbers, and runs of CJK ideographs (plus kana/hangul)
+_CJK = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff"
+TOKEN_RE = re.compile(rf"[a-z0-9][a-z0-9+#]*|[{_CJK}]+")
+CJK_RE = re.compile(rf"[{_CJK}]")
+
+# Title matches count more than body matches
+FIELD_WEIGHTS = {"title": 3, "url": 1, "body": 1}
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    doc_id INTEGER PRIMARY KEY,
+    date TEXT NOT NULL,
+    position INTEGER NOT NULL,   -- -1 for the day's intro
+    story_id INTEGER,
+    title TEXT NOT NULL,
+    url TEXT,
+    summary TEXT NOT NULL,
+    category TEXT,
+    importance INTEGER,
+    length INTEGER NOT NULL,
+    UNIQUE (date, position)
+);
+CREATE INDEX IF NOT EXISTS idx_docs_category ON docs(category, date);
+
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    doc_id INTEGER NOT NULL,
+    tf INTEGER NOT NULL,
+    PRIMARY KEY (term, doc_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_postings_doc ON postings(doc_id);
+"""
+
+
+def tokenize(text: str | None) -> list[str]:
+    """Word tokens for Latin text, overlapping bigrams for CJK runs."""
+    if not text:
+        return []
+    tokens = []
+    for match in TOKEN_RE.finditer(text.lower()):
+        token = match.group()
+        if CJK_RE.match(token):
+            if len(token) == 1:
+                tokens.append(token)
+            else:
+                tokens.extend(token[i:i + 2] for i in range(len(token) - 1))
+        elif len(token) > 1 or token.isdigit():
+            tokens.append(token)
+    return tokens
+
+
+def _weighted_terms(fields: dict[str, str | None]) -> Counter:
+    terms = Counter()
+    for name, text in fields.items():
+        weight = FIELD_WEIGHTS[name]
+        for token in tokenize(text):
+            terms[token] += weight
+    return terms
+
+
+class SearchIndex:
+    """BM25-ranked inverted index in SQLite, updated one digest at a time."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def index_digest(self, digest: DailyDigest):
+        """(Re)index one day's digest, replacing whatever was indexed for that date."""
+        docs = [(
+            -1, None, f"HN 每日精选 {digest.date}", None, digest.intro, None, None,
+            _weighted_terms({"body": digest.intro}),
+        )]
+        for position, ds in enumerate(digest.stories):
+            terms = _weighted_terms({
+                "title": ds.story.title,
+                "url": ds.story.url,
+                "body": ds.summary_zh,
+            })
+            docs.append((
+                position, ds.story.id, ds.story.title, ds.story.url or ds.story.hn_url,
+                ds.summary_zh, ds.category, ds.importance, terms,
+            ))
+
+        with self._connect() as conn:
+            conn.execute(
+                "DELETE FROM postings WHERE doc_id IN (SELECT doc_id FROM docs WHERE date = ?)",
+                (digest.date,),
+            )
+            conn.execute("DELETE FROM docs WHERE date = ?", (digest.date,))
+            for position, story_id, title, url, summary, category, importance, terms in docs:
+                cur = conn.execute(
+                    "INSERT INTO docs (date, position, story_id, title, url, summary, category, "
+                    "importance, length) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (digest.date, position, story_id, title, url, summary, category,
+                     importance, sum(terms.values())),
+                )
+                conn.executemany(
+                    "INSERT INTO postings (term, doc_id, tf) VALUES (?, ?, ?)",
+                    [(term, cur.lastrowid, tf) for term, tf in terms.items()],
+                )
+
+    def search(
+        self,
+        query: str,
+        date_from: str | None = None,
+        date_to: str | None = None,
+        category: str | None = None,
+        limit: int = 20,
+        offset: int = 0,
+    ) -> dict:
+        """Ranked matches for `query` with optional date/category filters and paging."""
+        terms = sorted(set(tokenize(query)))
+        if not terms:
+            return {"query": query, "total": 0, "results": []}
+
+        conn = self._connect()
+        doc_count, avg_length = conn.execute("SELECT COUNT(*), AVG(length) FROM docs").fetchone()
+        if not doc_count:
+            return {"query": query, "total": 0, "results": []}
+
+        marks = ",".join("?" * len(terms))
+        df = dict(conn.execute(
+            f"SELECT term, COUNT(*) FROM postings WHERE term IN ({marks}) GROUP BY term", terms
+        ).fetchall())
+        idf = {
+            t: math.log(1 + (doc_count - df[t] + 0.5) / (df[t] + 0.5)) for t in terms if t in df
+        }
+        if not idf:
+            return {"query": query, "total": 0, "results": []}
+
+        where, params = [], []
+        if date_from:
+            where.append("d.date >= ?")
+            params.append(date_from)
+        if date_to:
+            where.append("d.date <= ?")
+            params.append(date_to)
+        if category:
+            where.append("d.category = ?")
+            params.append(category)
+        filters = "".join(f" AND {w}" for w in where)
+
+        query_terms = "VALUES " + ",".join("(?, ?)" for _ in idf)
+        term_params = [x for t, w in idf.items() for x in (t, w)]
+        matched = f"""
+            WITH q(term, idf) AS ({query_terms})
+            SELECT d.*, SUM(q.idf * p.tf * {K1 + 1}
+                / (p.tf + {K1} * (1 - {B} + {B} * d.length / ?))) AS score
+            FROM q
+            JOIN postings p ON p.term = q.term
+            JOIN docs d ON d.doc_id = p.doc_id
+            WHERE 1 = 1{filters}
+            GROUP BY d.doc_id
+        """
+        base_params = term_params + [avg_length] + params
+
+        total = conn.execute(f"SELECT COUNT(*) FROM ({matched})", base_params).fetchone()[0]
+        rows = conn.execute(
+            f"{matched} ORDER BY score DESC, d.date DESC LIMIT ? OFFSET ?",
+            base_params + [limit, offset],
+        ).fetchall()
+
+        return {
+            "query": query,
+            "total": total,
+            "results": [
+                {
+                    "type": "intro" if r["position"] < 0 else "story",
+                    "date": r["date"],
+                    "story_id": r["story_id"],
+                    "title": r["title"],
+                    "url": r["url"],
+                    "summary_zh": r["summary"],
+                    "category": r["category"],
+                    "importance": r["importance"],
+                    "score": round(r["score"], 4),
+                }
+                for r in rows
+            ],
+        }
+
+    def indexed_dates(self) -> set[str]:
+        rows = self._connect().execute("SELECT DISTINCT date FROM docs").fetchall()
+        return {r["date"] for r in rows}
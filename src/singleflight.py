@@ -0,0 +1,36 @@
+"""
+Single-flight coordination - collapse concurrent calls for the same key into one
+"""
+import asyncio
+from typing import Awaitable, Callable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Run at most one coroutine per key; concurrent callers share its result."""
+
+    def __init__(self):
+        self._inflight: dict[str, asyncio.Task] = {}
+
+    def in_flight(self, key: str) -> bool:
+        return key in self._inflight
+
+    def start(self, key: str, fn: Callable[[], Awaitable[T]]) -> asyncio.Task:
+        """Start `fn` for `key` unless it is already running. Returns the shared task."""
+        task = self._inflight.get(key)
+        if task is not None:
+            return task
+
+        task = asyncio.ensure_future(fn())
+        self._inflight[key] = task
+
+        def _done(t: asyncio.Task):
+            if self._inflight.get(key) is t:
+                del self._inflight[key]
+            # Mark background failures as retrieved; awaiting callers still see them
+            if not t.cancelled() and t.exception() is not None and not t.get_loop().is_closed():
+                print(f"⚠️ Background job {key!r} failed: {t.exception()}")
+
+        task.add_done_callback(_done)
+        return task
@@ -0,0 +1,213 @@
+"""
+SQLite storage engine for HN Digest (WAL mode, indexed for history and stats)
+"""
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator
+
+from .scraper import Story
+from .summarizer import DailyDigest, DigestedStory
+from .storage import DATA_DIR, _deserialize_digest, story_record
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS digests (
+    date TEXT PRIMARY KEY,
+    intro TEXT NOT NULL,
+    generated_at TEXT,
+    story_count INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS stories (
+    date TEXT NOT NULL REFERENCES digests(date) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    story_id INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    url TEXT,
+    score INTEGER NOT NULL,
+    by TEXT NOT NULL,
+    time TEXT NOT NULL,
+    descendants INTEGER NOT NULL,
+    text TEXT,
+    summary_zh TEXT NOT NULL,
+    category TEXT NOT NULL,
+    importance INTEGER NOT NULL,
+    PRIMARY KEY (date, position)
+);
+
+CREATE INDEX IF NOT EXISTS idx_stories_story_id ON stories(story_id);
+CREATE INDEX IF NOT EXISTS idx_stories_category ON stories(category, date);
+CREATE INDEX IF NOT EXISTS idx_stories_importance ON stories(importance, date);
+"""
+
+
+class SQLiteStorage:
+    """Digests and their stories in one SQLite database."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        """One connection per thread; sqlite3 connections aren't shareable across threads."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    def save(self, digest: DailyDigest) -> Path:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO digests (date, intro, generated_at, story_count) "
+                "VALUES (?, ?, ?, ?)",
+                (digest.date, digest.intro, digest.generated_at, len(digest.stories)),
+            )
+            conn.execute("DELETE FROM stories WHERE date = ?", (digest.date,))
+            conn.executemany(
+                "INSERT INTO stories (date, position, story_id, title, url, score, by, time, "
+                "descendants, text, summary_zh, category, importance) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        digest.date, position, ds.story.id, ds.story.title, ds.story.url,
+                        ds.story.score, ds.story.by, ds.story.time.isoformat(),
+                        ds.story.descendants, ds.story.text, ds.summary_zh, ds.category,
+                        ds.importance,
+                    )
+                    for position, ds in enumerate(digest.stories)
+                ],
+            )
+        return self.path
+
+    def load(self, date_str: str) -> DailyDigest | None:
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT date, intro, generated_at FROM digests WHERE date = ?", (date_str,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        rows = conn.execute(
+            "SELECT * FROM stories WHERE date = ? ORDER BY position", (date_str,)
+        ).fetchall()
+        return DailyDigest(
+            date=row["date"],
+            intro=row["intro"],
+            stories=[_row_to_story(r) for r in rows],
+            generated_at=row["generated_at"],
+        )
+
+    def version(self, date_str: str) -> str | None:
+        row = self._connect().execute(
+            "SELECT generated_at FROM digests WHERE date = ?", (date_str,)
+        ).fetchone()
+        return row["generated_at"] if row is not None else None
+
+    def list(self, limit: int) -> list[str]:
+        rows = self._connect().execute(
+            "SELECT date FROM digests ORDER BY date DESC LIMIT ?", (limit,)
+        ).fetchall()
+        return [r["date"] for r in rows]
+
+    def iter_stories(
+        self,
+        date_from: str | None = None,
+        date_to: str | None = None,
+        category: str | None = None,
+        min_importance: int | None = None,
+        after: tuple[str, int] | None = None,
+        batch_size: int = 500,
+    ) -> Iterator[dict]:
+        """Matching stories in (date, position) order, fetched in keyset-paged batches.
+
+        Each batch is a complete query, so the generator may be resumed from a
+        different thread (as Starlette does) without sharing a cursor.
+        """
+        where, params = [], []
+        if date_from:
+            where.append("date >= ?")
+            params.append(date_from)
+        if date_to:
+            where.append("date <= ?")
+            params.append(date_to)
+        if category:
+            where.append("category = ?")
+            params.append(category)
+        if min_importance is not None:
+            where.append("importance >= ?")
+            params.append(min_importance)
+        filters = "".join(f" AND {w}" for w in where)
+
+        while True:
+            rows = self._connect().execute(
+                f"SELECT * FROM stories WHERE (date, position) > (?, ?){filters} "
+                "ORDER BY date, position LIMIT ?",
+                [*(after or ("", -1)), *params, batch_size],
+            ).fetchall()
+            for row in rows:
+                story = {**dict(row), "id": row["story_id"]}
+                yield story_record(row["date"], row["position"], story)
+            if len(rows) < batch_size:
+                return
+            after = (rows[-1]["date"], rows[-1]["position"])
+
+    def stats(self) -> dict:
+        conn = self._connect()
+        digest_count, story_count = conn.execute(
+            "SELECT (SELECT COUNT(*) FROM digests), (SELECT COUNT(*) FROM stories)"
+        ).fetchone()
+        size = sum(
+            p.stat().st_size
+            for p in (self.path, Path(f"{self.path}-wal"))
+            if p.exists()
+        )
+        return {
+            "backend": "sqlite",
+            "digest_count": digest_count,
+            "story_count": story_count,
+            "total_size_kb": round(size / 1024, 2),
+            "data_dir": str(DATA_DIR),
+        }
+
+
+def _row_to_story(row: sqlite3.Row) -> DigestedStory:
+    return DigestedStory(
+        story=Story(
+            id=row["story_id"],
+            title=row["title"],
+            url=row["url"],
+            score=row["score"],
+            by=row["by"],
+            time=datetime.fromisoformat(row["time"]),
+            descendants=row["descendants"],
+            text=row["text"],
+        ),
+        summary_zh=row["summary_zh"],
+        category=row["category"],
+        importance=row["importance"],
+    )
+
+
+def migrate_from_json(json_dir: Path, storage: SQLiteStorage) -> dict:
+    """One-shot import of data/digests/*.json. Unreadable files are reported, not fatal."""
+    migrated, failed = [], {}
+    for filepath in sorted(Path(json_dir).glob("*.json")):
+        try:
+            with open(filepath, "r", encoding="utf-8") as f:
+                digest = _deserialize_digest(json.load(f))
+        except (OSError, ValueError, KeyError) as e:
+            failed[filepath.name] = f"{type(e).__name__}: {e}"
+            continue
+        storage.save(digest)
+        migrated.append(digest.date)
+    return {"migrated": migrated, "failed": failed}
@@ -1,19 +1,28 @@
 """
-Simple JSON file storage for HN Digest
+Digest storage for HN Digest - JSON files by default, SQLite optionally
 """
 import json
 import os
 from datetime import date, datetime
 from pathlib import Path
-from dataclasses import asdict
-from typing import Any
+from typing import Iterator, Protocol
 
 from .scraper import Story
 from .summarizer import DailyDigest, DigestedStory
+from .cache import digest_cache
+from .locks import ChangeSignal
+from .metrics import JSON_PARSE_SECONDS, STORAGE_SECONDS
+from .search import SearchIndex
 
 # Default data directory
 DATA_DIR = Path(os.getenv("HN_DIGEST_DATA_DIR", "/root/source/side-projects/hn-digest/data"))
 
+# Storage engine: "json" (one file per day) or "sqlite"
+STORAGE_BACKEND = os.getenv("HN_DIGEST_STORAGE", "json")
+
+# Saved digest versions, shared by every worker process using DATA_DIR
+digest_cache.signal = ChangeSignal(DATA_DIR / "digests.version")
+
 
 def ensure_dirs():
     """Create data directories if they don't exist."""
@@ -25,9 +34,10 @@ def _serialize_digest(digest: DailyDigest) -> dict:
     return {
         "date": digest.date,
         "intro": digest.intro,
-        "generated_at": datetime.utcnow().isoformat(),
+        "generated_at": digest.generated_at or datetime.utcnow().isoformat(),
         "stories": [
             {
+                "id": ds.story.id,
                 "title": ds.story.title,
                 "url": ds.story.url,
                 "hn_url": ds.story.hn_url,
@@ -45,12 +55,22 @@ def _serialize_digest(digest: DailyDigest) -> dict:
     }
 
 
+def story_id_from_hn_url(hn_url: str | None) -> int:
+    """Recover a story id from its HN discussion URL (older files don't store it)."""
+    if hn_url and "id=" in hn_url:
+        try:
+            return int(hn_url.rsplit("id=", 1)[1].split("&")[0])
+        except ValueError:
+            pass
+    return 0
+
+
 def _deserialize_digest(data: dict) -> DailyDigest:
     """Convert dict back to DailyDigest."""
     stories = []
     for s in data["stories"]:
         story = Story(
-            id=0,  # Not stored, use hn_url to derive if needed
+            id=s.get("id") or story_id_from_hn_url(s.get("hn_url")),
             title=s["title"],
             url=s["url"],
             score=s["score"],
@@ -70,31 +90,216 @@ def _deserialize_digest(data: dict) -> DailyDigest:
         date=data["date"],
         intro=data["intro"],
         stories=stories,
+        generated_at=data.get("generated_at"),
     )
 
 
-def save_digest(digest: DailyDigest) -> Path:
-    """Save digest to JSON file. Returns the file path."""
-    ensure_dirs()
-    filepath = DATA_DIR / "digests" / f"{digest.date}.json"
+def story_record(date_str: str, position: int, s: dict) -> dict:
+    """Flat export shape of one stored story, from its serialized (or row) dict."""
+    return {
+        "date": date_str,
+        "position": position,
+        "id": s["id"],
+        "title": s["title"],
+        "url": s["url"],
+        "hn_url": s.get("hn_url") or f"https://news.ycombinator.com/item?id={s['id']}",
+        "score": s["score"],
+        "comments": s["descendants"],
+        "by": s["by"],
+        "time": s["time"],
+        "summary_zh": s["summary_zh"],
+        "category": s["category"],
+        "importance": s["importance"],
+    }
+
+
+def parse_cursor(cursor: str) -> tuple[str, int]:
+    """Decode an export cursor ("<date>:<position>"). Raises ValueError if malformed."""
+    date_str, _, position = cursor.rpartition(":")
+    date.fromisoformat(date_str)
+    return date_str, int(position)
+
+
+def make_cursor(record: dict) -> str:
+    return f"{record['date']}:{record['position']}"
+
+
+class StorageBackend(Protocol):
+    """What a storage engine must provide; module-level functions delegate to it."""
+    
+    def save(self, digest: DailyDigest) -> Path: ...
+    def load(self, date_str: str) -> DailyDigest | None: ...
+    def version(self, date_str: str) -> str | None: ...
+    def list(self, limit: int) -> list[str]: ...
+    def stats(self) -> dict: ...
+    def iter_stories(
+        self,
+        date_from: str | None,
+        date_to: str | None,
+        category: str | None,
+        min_importance: int | None,
+        after: tuple[str, int] | None,
+    ) -> Iterator[dict]: ...
+
+
+class JSONFileStorage:
+    """One pretty-printed JSON file per day under DATA_DIR/digests."""
     
-    with open(filepath, "w", encoding="utf-8") as f:
-        json.dump(_serialize_digest(digest), f, ensure_ascii=False, indent=2)
+    def __init__(self, root: Path):
+        self.digests_dir = Path(root) / "digests"
     
-    return filepath
+    def save(self, digest: DailyDigest) -> Path:
+        self.digests_dir.mkdir(parents=True, exist_ok=True)
+        filepath = self.digests_dir / f"{digest.date}.json"
+        
+        # Write then rename, so readers in other workers never see a partial file
+        tmp = filepath.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(_serialize_digest(digest), f, ensure_ascii=False, indent=2)
+        os.replace(tmp, filepath)
+        return filepath
+    
+    def load(self, date_str: str) -> DailyDigest | None:
+        filepath = self.digests_dir / f"{date_str}.json"
+        
+        if not filepath.exists():
+            return None
+        
+        with open(filepath, "r", encoding="utf-8") as f:
+            raw = f.read()
+        with JSON_PARSE_SECONDS.time(source="digest"):
+            data = json.loads(raw)
+        
+        return _deserialize_digest(data)
+    
+    def version(self, date_str: str) -> str | None:
+        try:
+            st = os.stat(self.digests_dir / f"{date_str}.json")
+        except OSError:
+            return None
+        return f"{st.st_mtime_ns}:{st.st_size}"
+    
+    def list(self, limit: int) -> list[str]:
+        self.digests_dir.mkdir(parents=True, exist_ok=True)
+        files = sorted(self.digests_dir.glob("*.json"), reverse=True)[:limit]
+        return [f.stem for f in files]
+    
+    def iter_stories(
+        self,
+        date_from: str | None = None,
+        date_to: str | None = None,
+        category: str | None = None,
+        min_importance: int | None = None,
+        after: tuple[str, int] | None = None,
+    ) -> Iterator[dict]:
+        """Matching stories oldest first, reading one day's file at a time."""
+        dates = sorted(f.stem for f in self.digests_dir.glob("*.json"))
+        start = max(filter(None, (date_from, after[0] if after else None)), default=None)
+        for date_str in dates:
+            if (start and date_str < start) or (date_to and date_str > date_to):
+                continue
+            try:
+                with open(self.digests_dir / f"{date_str}.json", "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Skipping unreadable digest {date_str}: {e}")
+                continue
+            for position, s in enumerate(data["stories"]):
+                if after and (date_str, position) <= after:
+                    continue
+                if category and s["category"] != category:
+                    continue
+                if min_importance is not None and s["importance"] < min_importance:
+                    continue
+                s = {**s, "id": s.get("id") or story_id_from_hn_url(s.get("hn_url"))}
+                yield story_record(date_str, position, s)
+    
+    def stats(self) -> dict:
+        self.digests_dir.mkdir(parents=True, exist_ok=True)
+        files = list(self.digests_dir.glob("*.json"))
+        total_size = sum(f.stat().st_size for f in files)
+        
+        return {
+            "backend": "json",
+            "digest_count": len(files),
+            "total_size_kb": round(total_size / 1024, 2),
+            "data_dir": str(DATA_DIR),
+        }
 
 
-def load_digest(date_str: str) -> DailyDigest | None:
-    """Load digest for a specific date. Returns None if not found."""
-    filepath = DATA_DIR / "digests" / f"{date_str}.json"
+_backend: StorageBackend | None = None
+_search_index: SearchIndex | None = None
+
+
+def get_backend() -> StorageBackend:
+    """The configured storage engine (HN_DIGEST_STORAGE), created on first use."""
+    global _backend
+    if _backend is None:
+        if STORAGE_BACKEND == "sqlite":
+            from .sqlite_storage import SQLiteStorage
+            _backend = SQLiteStorage(DATA_DIR / "hn_digest.db")
+        elif STORAGE_BACKEND == "json":
+            _backend = JSONFileStorage(DATA_DIR)
+        else:
+            raise ValueError(f"Unknown HN_DIGEST_STORAGE: {STORAGE_BACKEND!r}")
+    return _backend
+
+
+def get_search_index() -> SearchIndex:
+    """The archive's full-text index, kept current by save_digest."""
+    global _search_index
+    if _search_index is None:
+        _search_index = SearchIndex(DATA_DIR / "search.db")
+    return _search_index
+
+
+def reindex_all(missing_only: bool = False) -> dict:
+    """Rebuild the search index from stored digests. Unreadable digests are reported, not fatal.
     
-    if not filepath.exists():
-        return None
+    With `missing_only`, dates already in the index are left as they are.
+    """
+    index = get_search_index()
+    dates = list_digests(limit=1_000_000)
+    if missing_only:
+        indexed = index.indexed_dates()
+        dates = [d for d in dates if d not in indexed]
     
-    with open(filepath, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    reindexed, failed = [], {}
+    for date_str in dates:
+        try:
+            digest = load_digest(date_str)
+        except (ValueError, KeyError) as e:
+            failed[date_str] = f"{type(e).__name__}: {e}"
+            continue
+        if digest is not None:
+            index.index_digest(digest)
+            reindexed.append(date_str)
+    return {"indexed": reindexed, "failed": failed}
+
+
+def save_digest(digest: DailyDigest) -> Path:
+    """Save digest to storage. Returns the file path."""
+    digest.generated_at = datetime.utcnow().isoformat()
+    with STORAGE_SECONDS.time(op="write", backend=STORAGE_BACKEND):
+        filepath = get_backend().save(digest)
     
-    return _deserialize_digest(data)
+    # A new version exists on disk; drop the stale rendered copy here and in other workers
+    digest_cache.invalidate(digest.date)
+    try:
+        digest_cache.signal.publish(digest.date, digest.generated_at)
+    except OSError as e:
+        print(f"⚠️ Failed to publish digest version {digest.date}: {e}")
+    try:
+        get_search_index().index_digest(digest)
+    except Exception as e:
+        print(f"⚠️ Failed to index digest {digest.date}: {e}")
+    return filepath
+
+
+def load_digest(date_str: str) -> DailyDigest | None:
+    """Load digest for a specific date. Returns None if not found."""
+    with STORAGE_SECONDS.time(op="read", backend=STORAGE_BACKEND):
+        return get_backend().load(date_str)
 
 
 def load_today() -> DailyDigest | None:
@@ -102,25 +307,27 @@ def load_today() -> DailyDigest | None:
     return load_digest(date.today().isoformat())
 
 
+def digest_version(date_str: str) -> str | None:
+    """A cheap stamp that changes whenever a date's stored digest is rewritten."""
+    return get_backend().version(date_str)
+
+
 def list_digests(limit: int = 30) -> list[str]:
     """List available digest dates, most recent first."""
-    ensure_dirs()
-    digests_dir = DATA_DIR / "digests"
-    
-    files = sorted(digests_dir.glob("*.json"), reverse=True)[:limit]
-    return [f.stem for f in files]
+    return get_backend().list(limit)
+
+
+def iter_stories(
+    date_from: str | None = None,
+    date_to: str | None = None,
+    category: str | None = None,
+    min_importance: int | None = None,
+    after: tuple[str, int] | None = None,
+) -> Iterator[dict]:
+    """Stream stored stories in (date, position) order, resuming after a cursor position."""
+    return get_backend().iter_stories(date_from, date_to, category, min_importance, after)
 
 
 def get_stats() -> dict:
     """Get storage statistics."""
-    ensure_dirs()
-    digests_dir = DATA_DIR / "digests"
-    
-    files = list(digests_dir.glob("*.json"))
-    total_size = sum(f.stat().st_size for f in files)
-    
-    return {
-        "digest_count": len(files),
-        "total_size_kb": round(total_size / 1024, 2),
-        "data_dir": str(DATA_DIR),
-    }
+    return get_backend().stats()
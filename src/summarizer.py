@@ -2,11 +2,41 @@
 AI Summarizer - Generate Chinese digest from HN stories (Gemini version)
 """
 import os
+import html
 import json
+import time
+import random
+import asyncio
 from dataclasses import dataclass
+from datetime import date
+from typing import Callable
 import httpx
 
+from .metrics import (
+    CACHE_REQUESTS, GEMINI_SECONDS, GEMINI_TOKENS, JSON_PARSE_SECONDS, LLM_STORY_ITEMS, RETRIES,
+)
 from .scraper import Story
+from .tracing import span
+from .summary_cache import SummaryCache, intro_input_hash, summary_input_hash
+
+GEMINI_API_URL = os.getenv(
+    "GEMINI_API_URL",
+    "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent",
+)
+
+# Transient Gemini responses worth retrying
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 30.0
+
+# Article text included per story in the prompt
+ARTICLE_EXCERPT_CHARS = 600
+# Comment digest included per story in the prompt
+COMMENT_EXCERPT_CHARS = 1200
+
+CATEGORIES = ("tech", "ai", "startup", "programming", "career", "other")
+# Follow-up calls for the stories a response left out or got wrong
+MAX_REPAIR_ROUNDS = 2
 
 
 @dataclass
@@ -22,24 +52,58 @@ class DailyDigest:
     date: str
     stories: list[DigestedStory]
     intro: str  # AI-generated intro paragraph
-    
+    generated_at: str | None = None  # set when the digest is saved
 
-async def fetch_article_content(url: str, max_chars: int = 8000) -> str | None:
-    """Fetch article content for better summarization."""
-    if not url:
-        return None
+
+def select_stories(
+    stories: list[Story],
+    max_stories: int = 10,
+    key: Callable[[Story], float] | None = None,
+) -> list[Story]:
+    """Pick the stories a digest is written about: the top N by `key` (default: score)."""
+    return sorted(stories, key=key or (lambda s: s.score), reverse=True)[:max_stories]
+
+
+def parse_story_items(text: str) -> list[dict]:
+    """Story objects from an LLM response, recovering what it can from broken JSON.
+    
+    A well-formed `{"stories": [...]}` is read directly. Otherwise every
+    complete `{...}` object with an "index" is kept, so code fences, chatter,
+    a bad item or a response cut off mid-object only lose the items affected.
+    """
     try:
-        async with httpx.AsyncClient(timeout=15.0, follow_redirects=True) as client:
-            resp = await client.get(url, headers={
-                "User-Agent": "Mozilla/5.0 (compatible; HNDigestBot/1.0)"
-            })
-            if resp.status_code == 200:
-                # Very basic extraction - just get text
-                text = resp.text[:max_chars]
-                return text
-    except Exception:
+        data = json.loads(_strip_code_fence(text))
+        if isinstance(data, dict) and isinstance(data.get("stories"), list):
+            return [item for item in data["stories"] if isinstance(item, dict)]
+    except ValueError:
         pass
-    return None
+    
+    decoder = json.JSONDecoder()
+    items = []
+    pos = text.find("{")
+    while pos != -1:
+        try:
+            obj, end = decoder.raw_decode(text, pos)
+        except ValueError:
+            pos = text.find("{", pos + 1)
+            continue
+        if isinstance(obj, dict) and "index" in obj:
+            items.append(obj)
+            pos = text.find("{", end)
+        else:
+            pos = text.find("{", pos + 1)
+    return items
+
+
+def _strip_code_fence(text: str) -> str:
+    text = text.strip()
+    
+    # Handle markdown code blocks
+    if text.startswith("```"):
+        text = text.split("```")[1]
+        if text.startswith("json"):
+            text = text[4:]
+    return text.strip()
 
 
 def create_summarizer(api_key: str | None = None) -> "Summarizer":
@@ -47,63 +111,123 @@ def create_summarizer(api_key: str | None = None) -> "Summarizer":
     key = api_key or os.getenv("GOOGLE_API_KEY")
     if not key:
         raise ValueError("GOOGLE_API_KEY required")
-    return Summarizer(key)
+    return Summarizer(key, shard_size=int(os.getenv("GEMINI_SHARD_SIZE", "5")))
+
+
+def create_async_summarizer(
+    api_key: str | None = None, summary_cache: SummaryCache | None = None
+) -> "AsyncSummarizer":
+    """Create an async summarizer instance (for use inside the event loop)."""
+    key = api_key or os.getenv("GOOGLE_API_KEY")
+    if not key:
+        raise ValueError("GOOGLE_API_KEY required")
+    return AsyncSummarizer(
+        key,
+        max_concurrency=int(os.getenv("GEMINI_MAX_CONCURRENCY", "4")),
+        shard_size=int(os.getenv("GEMINI_SHARD_SIZE", "5")),
+        summary_cache=summary_cache,
+    )
 
 
-class Summarizer:
-    def __init__(self, api_key: str):
+class _SummarizerBase:
+    """Prompt building, response parsing and retry policy shared by both clients.
+    
+    Stories are summarized in shards of `shard_size` per LLM call; summaries
+    found in `summary_cache` for unchanged inputs are reused, and the intro is
+    written by a separate small call over the finished summaries. Stories a
+    response leaves out or gets wrong are re-requested, up to `max_repairs`
+    follow-up calls per shard.
+    """
+    
+    def __init__(
+        self,
+        api_key: str,
+        api_url: str | None = None,
+        max_retries: int = 3,
+        shard_size: int = 5,
+        summary_cache: SummaryCache | None = None,
+        max_repairs: int = MAX_REPAIR_ROUNDS,
+    ):
         self.api_key = api_key
-        self.api_url = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent"
+        self.api_url = api_url or GEMINI_API_URL
+        self.max_retries = max_retries
+        self.shard_size = max(1, shard_size)
+        self.summary_cache = summary_cache
+        self.max_repairs = max_repairs
     
-    def _call_gemini(self, prompt: str) -> str:
-        """Call Gemini API synchronously."""
-        import requests
-        
-        response = requests.post(
-            f"{self.api_url}?key={self.api_key}",
-            json={
-                "contents": [{"parts": [{"text": prompt}]}],
-                "generationConfig": {
-                    "temperature": 0.7,
-                    "maxOutputTokens": 2000,
-                }
-            },
-            headers={"Content-Type": "application/json"},
-            timeout=60
-        )
-        response.raise_for_status()
-        data = response.json()
+    def _request_body(self, prompt: str) -> dict:
+        return {
+            "contents": [{"parts": [{"text": prompt}]}],
+            "generationConfig": {
+                "temperature": 0.7,
+                "maxOutputTokens": 2000,
+            }
+        }
+    
+    def _extract_text(self, data: dict) -> str:
+        usage = data.get("usageMetadata") or {}
+        for kind, field in (
+            ("prompt", "promptTokenCount"),
+            ("output", "candidatesTokenCount"),
+            ("total", "totalTokenCount"),
+        ):
+            if usage.get(field):
+                GEMINI_TOKENS.inc(usage[field], type=kind)
         return data["candidates"][0]["content"]["parts"][0]["text"]
     
-    def summarize_stories(self, stories: list[Story], max_stories: int = 10) -> DailyDigest:
-        """Generate a daily digest from stories."""
-        # Sort by score and take top N
-        sorted_stories = sorted(stories, key=lambda s: s.score, reverse=True)[:max_stories]
-        
-        # Build prompt
+    def _retry_delay(self, attempt: int, retry_after: str | None) -> float:
+        """Seconds to wait before retry number `attempt` (0-based)."""
+        if retry_after:
+            try:
+                return min(float(retry_after), RETRY_MAX_DELAY)
+            except ValueError:
+                pass
+        return min(RETRY_BASE_DELAY * 2 ** attempt, RETRY_MAX_DELAY) * (0.5 + random.random())
+    
+    def _format_story(
+        self, index: int, s: Story, article: str | None = None, comments: str | None = None
+    ) -> str:
+        lines = [
+            f"### {index}. {s.title}",
+            f"Score: {s.score} | Comments: {s.descendants} | By: {s.by}",
+            f"URL: {s.url or s.hn_url}",
+        ]
+        if s.text:
+            lines.append(f"Text: {s.text[:500]}...")
+        if article:
+            lines.append(f"Excerpt: {article[:ARTICLE_EXCERPT_CHARS]}")
+        if comments:
+            lines.append(f"Top comments:\n{comments[:COMMENT_EXCERPT_CHARS]}")
+        return "\n".join(lines)
+    
+    def _build_stories_prompt(
+        self,
+        shard: list[Story],
+        articles: dict[int, str],
+        comments: dict[int, str] | None = None,
+    ) -> str:
+        comments = comments or {}
         stories_text = "\n\n".join([
-            f"### {i+1}. {s.title}\n"
-            f"Score: {s.score} | Comments: {s.descendants} | By: {s.by}\n"
-            f"URL: {s.url or s.hn_url}\n"
-            f"{'Text: ' + s.text[:500] + '...' if s.text else ''}"
-            for i, s in enumerate(sorted_stories)
+            self._format_story(i + 1, s, articles.get(s.id), comments.get(s.id))
+            for i, s in enumerate(shard)
         ])
+        discussion = ""
+        if any(comments.get(s.id) for s in shard):
+            discussion = "（如提供了热门评论，可用一句话点出社区讨论的焦点）"
         
-        prompt = f"""你是一位资深科技编辑，负责为中国开发者编写每日 Hacker News 精选。
+        return f"""你是一位资深科技编辑，负责为中国开发者编写每日 Hacker News 精选。
 
-今日 Top Stories:
+今日 Top Stories（部分）:
 {stories_text}
 
-请完成以下任务：
+请为每篇文章完成以下任务：
 
-1. 为每篇文章写一个简洁的中文摘要（2-3句话），解释为什么这篇文章值得关注
-2. 给每篇文章分类：tech/ai/startup/programming/career/other
-3. 给每篇文章打重要性分数 1-5（5最重要）
-4. 写一段今日科技圈总结作为开场白（3-4句话）
+1. 写一个简洁的中文摘要（2-3句话），解释为什么这篇文章值得关注{discussion}
+2. 分类：tech/ai/startup/programming/career/other
+3. 打重要性分数 1-5（5最重要）
 
 输出格式（JSON）：
 {{
-  "intro": "今日开场白...",
   "stories": [
     {{
       "index": 1,
@@ -115,38 +239,346 @@ class Summarizer:
 }}
 
 只输出 JSON，不要其他内容。"""
+    
+    def _build_intro_prompt(self, digested: list[DigestedStory]) -> str:
+        stories_text = "\n".join([
+            f"{i+1}. {ds.story.title}（{ds.category}，重要性 {ds.importance}）：{ds.summary_zh}"
+            for i, ds in enumerate(digested)
+        ])
+        
+        return f"""你是一位资深科技编辑，负责为中国开发者编写每日 Hacker News 精选。
+
+今日精选文章及摘要：
+{stories_text}
+
+请写一段今日科技圈总结作为开场白（3-4句话）。
 
-        text = self._call_gemini(prompt).strip()
+只输出开场白正文，不要标题或其他内容。"""
+    
+    def _parse_stories(self, text: str, shard: list[Story]) -> list[DigestedStory]:
+        """The valid summaries in a response, at most one per shard story."""
+        with JSON_PARSE_SECONDS.time(source="llm"):
+            items = parse_story_items(text)
         
-        # Handle markdown code blocks
-        if text.startswith("```"):
-            text = text.split("```")[1]
-            if text.startswith("json"):
-                text = text[4:]
-        text = text.strip()
+        digested: dict[int, DigestedStory] = {}
+        for item in items:
+            ds = self._validate_item(item, shard)
+            if ds is None:
+                LLM_STORY_ITEMS.inc(result="invalid")
+            elif ds.story.id not in digested:
+                LLM_STORY_ITEMS.inc(result="ok")
+                digested[ds.story.id] = ds
+        LLM_STORY_ITEMS.inc(len(shard) - len(digested), result="missing")
+        return list(digested.values())
+    
+    def _validate_item(self, item: dict, shard: list[Story]) -> DigestedStory | None:
+        """A DigestedStory for one parsed item, or None if it can't be used."""
+        try:
+            idx = int(item["index"]) - 1
+            importance = int(item["importance"])
+        except (KeyError, TypeError, ValueError):
+            return None
+        summary = item.get("summary_zh")
+        if not 0 <= idx < len(shard) or not isinstance(summary, str) or not summary.strip():
+            return None
+        category = str(item.get("category", "")).strip().lower()
+        return DigestedStory(
+            story=shard[idx],
+            summary_zh=summary.strip(),
+            category=category if category in CATEGORIES else "other",
+            importance=min(max(importance, 1), 5),
+        )
+    
+    def _unanswered(self, shard: list[Story], digested: list[DigestedStory]) -> list[Story]:
+        """Stories of the shard still without a summary."""
+        done = {ds.story.id for ds in digested}
+        missing = [s for s in shard if s.id not in done]
+        if missing:
+            print(f"⚠️ Gemini response missed {len(missing)}/{len(shard)} stories")
+        return missing
+    
+    def _plan(
+        self, sorted_stories: list[Story], articles: dict[int, str]
+    ) -> tuple[dict[int, DigestedStory], list[list[Story]]]:
+        """Split stories into cached summaries and shards that still need the LLM."""
+        cached: dict[int, DigestedStory] = {}
+        pending: list[Story] = []
+        for s in sorted_stories:
+            hit = None
+            if self.summary_cache is not None:
+                hit = self.summary_cache.get(s.id, summary_input_hash(s, articles.get(s.id)))
+            CACHE_REQUESTS.inc(cache="summary", result="miss" if hit is None else "hit")
+            if hit is None:
+                pending.append(s)
+            else:
+                cached[s.id] = DigestedStory(
+                    story=s,
+                    summary_zh=hit["summary_zh"],
+                    category=hit["category"],
+                    importance=hit["importance"],
+                )
         
-        data = json.loads(text)
+        shards = [pending[i:i + self.shard_size] for i in range(0, len(pending), self.shard_size)]
+        return cached, shards
+    
+    def _collect(
+        self,
+        sorted_stories: list[Story],
+        articles: dict[int, str],
+        cached: dict[int, DigestedStory],
+        fresh: list[DigestedStory],
+    ) -> list[DigestedStory]:
+        """Store new summaries and return all of them in selection order."""
+        if self.summary_cache is not None:
+            self.summary_cache.put_many([
+                (
+                    ds.story.id,
+                    summary_input_hash(ds.story, articles.get(ds.story.id)),
+                    {
+                        "summary_zh": ds.summary_zh,
+                        "category": ds.category,
+                        "importance": ds.importance,
+                    },
+                )
+                for ds in fresh
+            ])
         
-        # Build digest
-        digested = []
-        for item in data["stories"]:
-            idx = item["index"] - 1
-            if 0 <= idx < len(sorted_stories):
-                digested.append(DigestedStory(
-                    story=sorted_stories[idx],
-                    summary_zh=item["summary_zh"],
-                    category=item["category"],
-                    importance=item["importance"],
-                ))
+        by_id = {**cached, **{ds.story.id: ds for ds in fresh}}
+        return [by_id[s.id] for s in sorted_stories if s.id in by_id]
+    
+    def _cached_intro(self, digested: list[DigestedStory]) -> tuple[str, str | None]:
+        """(intro cache key, cached intro or None) for a set of summaries."""
+        key = intro_input_hash([ds.summary_zh for ds in digested])
+        if self.summary_cache is None:
+            return key, None
+        intro = self.summary_cache.get_intro(key)
+        CACHE_REQUESTS.inc(cache="intro", result="miss" if intro is None else "hit")
+        return key, intro
+    
+    def _store_intro(self, key: str, intro: str):
+        if self.summary_cache is not None:
+            self.summary_cache.put_intro(key, intro)
+
+
+class Summarizer(_SummarizerBase):
+    def _call_gemini(self, prompt: str) -> str:
+        """Call Gemini API synchronously, retrying on 429/5xx."""
+        import requests
+        
+        attempt = 0
+        while True:
+            with GEMINI_SECONDS.time(status="error") as labels, span(
+                "gemini", "llm", attempt=attempt, prompt_chars=len(prompt)
+            ) as args:
+                response = requests.post(
+                    f"{self.api_url}?key={self.api_key}",
+                    json=self._request_body(prompt),
+                    headers={"Content-Type": "application/json"},
+                    timeout=60
+                )
+                labels["status"] = args["status"] = response.status_code
+                args["bytes"] = len(response.content)
+            if response.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                time.sleep(self._retry_delay(attempt, response.headers.get("Retry-After")))
+                attempt += 1
+                RETRIES.inc(client="gemini")
+                continue
+            response.raise_for_status()
+            return self._extract_text(response.json())
+    
+    def summarize_stories(
+        self,
+        stories: list[Story],
+        max_stories: int = 10,
+        date_str: str | None = None,
+        articles: dict[int, str] | None = None,
+        rank_key: Callable[[Story], float] | None = None,
+        comments: dict[int, str] | None = None,
+    ) -> DailyDigest:
+        """Generate a daily digest from stories, optionally with article text and
+        comment digests by story id."""
+        articles = articles or {}
+        sorted_stories = select_stories(stories, max_stories, rank_key)
+        cached, shards = self._plan(sorted_stories, articles)
+        
+        fresh = []
+        for shard in shards:
+            fresh.extend(self._summarize_shard(shard, articles, comments))
+        digested = self._collect(sorted_stories, articles, cached, fresh)
+        if sorted_stories and not digested:
+            raise RuntimeError("Gemini returned no usable summaries")
         
-        from datetime import date
+        intro_key, intro = self._cached_intro(digested)
+        if intro is None:
+            intro = self._call_gemini(self._build_intro_prompt(digested)).strip()
+            self._store_intro(intro_key, intro)
         return DailyDigest(
-            date=date.today().isoformat(),
+            date=date_str or date.today().isoformat(),
             stories=digested,
-            intro=data["intro"],
+            intro=intro,
         )
 
 
+    def _summarize_shard(
+        self,
+        shard: list[Story],
+        articles: dict[int, str],
+        comments: dict[int, str] | None = None,
+    ) -> list[DigestedStory]:
+        """Summaries for a shard; stories a response drops are re-requested on their own."""
+        digested, pending = [], shard
+        for attempt in range(self.max_repairs + 1):
+            if attempt:
+                RETRIES.inc(client="gemini_partial")
+            text = self._call_gemini(self._build_stories_prompt(pending, articles, comments))
+            digested.extend(self._parse_stories(text, pending))
+            pending = self._unanswered(pending, digested)
+            if not pending:
+                break
+        else:
+            print(f"⚠️ Dropping {len(pending)} stories Gemini didn't summarize")
+        return digested
+
+
+class AsyncSummarizer(_SummarizerBase):
+    """Non-blocking summarizer backed by one long-lived, pooled httpx client."""
+    
+    def __init__(
+        self,
+        api_key: str,
+        api_url: str | None = None,
+        max_retries: int = 3,
+        max_concurrency: int = 4,
+        timeout: float = 60.0,
+        shard_size: int = 5,
+        summary_cache: SummaryCache | None = None,
+        max_repairs: int = MAX_REPAIR_ROUNDS,
+    ):
+        super().__init__(api_key, api_url, max_retries, shard_size, summary_cache, max_repairs)
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self._client: httpx.AsyncClient | None = None
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.timeout, connect=10.0),
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                ),
+                headers={"Content-Type": "application/json"},
+            )
+        return self._client
+    
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
+    async def _call_gemini(self, prompt: str) -> str:
+        """Call Gemini API without blocking the event loop, retrying on 429/5xx."""
+        attempt = 0
+        while True:
+            retry_after = None
+            try:
+                async with self._semaphore:
+                    with GEMINI_SECONDS.time(status="error") as labels, span(
+                        "gemini", "llm", attempt=attempt, prompt_chars=len(prompt)
+                    ) as args:
+                        response = await self.client.post(
+                            self.api_url,
+                            params={"key": self.api_key},
+                            json=self._request_body(prompt),
+                        )
+                        labels["status"] = args["status"] = response.status_code
+                        args["bytes"] = len(response.content)
+                if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                    response.raise_for_status()
+                    return self._extract_text(response.json())
+                retry_after = response.headers.get("Retry-After")
+            except httpx.TransportError:
+                if attempt == self.max_retries:
+                    raise
+            # Back off outside the semaphore so waiting doesn't hold a slot
+            await asyncio.sleep(self._retry_delay(attempt, retry_after))
+            attempt += 1
+            RETRIES.inc(client="gemini")
+    
+    async def summarize_stories(
+        self,
+        stories: list[Story],
+        max_stories: int = 10,
+        date_str: str | None = None,
+        articles: dict[int, str] | None = None,
+        on_story: Callable[[DigestedStory], None] | None = None,
+        rank_key: Callable[[Story], float] | None = None,
+        comments: dict[int, str] | None = None,
+    ) -> DailyDigest:
+        """Generate a daily digest from stories, optionally with article text and
+        comment digests by story id.
+        
+        `on_story` is called with each summary as soon as it is available: cached
+        ones first, then each shard's as its response arrives. `rank_key` picks and
+        orders the stories (see select_stories).
+        """
+        articles = articles or {}
+        sorted_stories = select_stories(stories, max_stories, rank_key)
+        cached, shards = self._plan(sorted_stories, articles)
+        if on_story is not None:
+            for ds in cached.values():
+                on_story(ds)
+        
+        # Shards are independent, so one slow response no longer gates the rest
+        results = await asyncio.gather(
+            *(self._summarize_shard(shard, articles, on_story, comments) for shard in shards)
+        )
+        fresh = [ds for shard_result in results for ds in shard_result]
+        digested = self._collect(sorted_stories, articles, cached, fresh)
+        if sorted_stories and not digested:
+            raise RuntimeError("Gemini returned no usable summaries")
+        
+        intro_key, intro = self._cached_intro(digested)
+        if intro is None:
+            with span("intro", "llm"):
+                intro = (await self._call_gemini(self._build_intro_prompt(digested))).strip()
+            self._store_intro(intro_key, intro)
+        return DailyDigest(
+            date=date_str or date.today().isoformat(),
+            stories=digested,
+            intro=intro,
+        )
+    
+    async def _summarize_shard(
+        self,
+        shard: list[Story],
+        articles: dict[int, str],
+        on_story: Callable[[DigestedStory], None] | None = None,
+        comments: dict[int, str] | None = None,
+    ) -> list[DigestedStory]:
+        """Summaries for a shard; stories a response drops are re-requested on their own."""
+        digested, pending = [], shard
+        for attempt in range(self.max_repairs + 1):
+            if attempt:
+                RETRIES.inc(client="gemini_partial")
+            with span("shard", "llm", stories=len(pending), attempt=attempt):
+                prompt = self._build_stories_prompt(pending, articles, comments)
+                text = await self._call_gemini(prompt)
+                parsed = self._parse_stories(text, pending)
+            if on_story is not None:
+                for ds in parsed:
+                    on_story(ds)
+            digested.extend(parsed)
+            pending = self._unanswered(pending, digested)
+            if not pending:
+                break
+        else:
+            print(f"⚠️ Dropping {len(pending)} stories Gemini didn't summarize")
+        return digested
+
+
 def format_digest_markdown(digest: DailyDigest) -> str:
     """Format digest as Markdown."""
     lines = [
@@ -187,20 +619,20 @@ def format_digest_markdown(digest: DailyDigest) -> str:
 
 
 def format_digest_telegram(digest: DailyDigest) -> str:
-    """Format digest for Telegram (no markdown tables)."""
+    """Format digest for Telegram (HTML parse mode, no markdown tables)."""
     lines = [
         f"🍊 <b>HN 每日精选 | {digest.date}</b>",
         "",
-        digest.intro,
+        html.escape(digest.intro, quote=False),
         "",
     ]
     
     for i, ds in enumerate(digest.stories[:5], 1):
         emoji = "🔥" if ds.importance >= 4 else "📰"
-        lines.append(f"{emoji} <b>{i}. {ds.story.title}</b>")
+        lines.append(f"{emoji} <b>{i}. {html.escape(ds.story.title, quote=False)}</b>")
         lines.append(f"   📊 {ds.story.score} | 💬 {ds.story.descendants} | 🏷️ {ds.category}")
-        lines.append(f"   {ds.summary_zh}")
-        url = ds.story.url or ds.story.hn_url
+        lines.append(f"   {html.escape(ds.summary_zh, quote=False)}")
+        url = html.escape(ds.story.url or ds.story.hn_url)
         lines.append(f'   <a href="{url}">原文</a> | <a href="{ds.story.hn_url}">讨论</a>')
         lines.append("")
     
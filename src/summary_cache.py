@@ -0,0 +1,86 @@
+"""
+Per-story summary cache - reuse LLM summaries while a story's inputs are unchanged
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from .scraper import Story
+
+# Cached summaries older than this are dropped on save
+MAX_AGE_SECONDS = 14 * 24 * 3600
+
+
+def summary_input_hash(story: Story, article: str | None = None) -> str:
+    """Hash of everything a story's summary is written from.
+
+    Score and comment count are deliberately left out: they move all day and
+    don't change what the story is about.
+    """
+    h = hashlib.sha256()
+    for part in (story.title, story.url or "", story.text or "", article or ""):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()[:32]
+
+
+def intro_input_hash(summaries: list[str]) -> str:
+    """Hash of the ordered summaries an intro is written from."""
+    return hashlib.sha256("\0".join(summaries).encode("utf-8")).hexdigest()[:32]
+
+
+class SummaryCache:
+    """Summaries keyed by story id, valid only for the input hash they were made from."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._entries: dict[str, dict] | None = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> dict[str, dict]:
+        if self._entries is None:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError):
+                self._entries = {}
+        return self._entries
+
+    def get(self, story_id: int | str, input_hash: str) -> dict | None:
+        """The cached {summary_zh, category, importance} if the inputs still match."""
+        with self._lock:
+            entry = self._load().get(str(story_id))
+        if entry is None or entry["input_hash"] != input_hash:
+            return None
+        return entry
+
+    def put_many(self, items: list[tuple[int | str, str, dict]]):
+        """Store (story_id, input_hash, summary fields) triples and persist once."""
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            entries = self._load()
+            for story_id, input_hash, fields in items:
+                entries[str(story_id)] = {**fields, "input_hash": input_hash, "created_at": now}
+            for key in [k for k, e in entries.items() if now - e["created_at"] > MAX_AGE_SECONDS]:
+                del entries[key]
+            self._persist(entries)
+
+    def get_intro(self, input_hash: str) -> str | None:
+        """A previously written intro for exactly this set of summaries."""
+        entry = self.get("intro", input_hash)
+        return entry["intro"] if entry else None
+
+    def put_intro(self, input_hash: str, intro: str):
+        self.put_many([("intro", input_hash, {"intro": intro})])
+
+    def _persist(self, entries: dict[str, dict]):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entries, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
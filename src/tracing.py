@@ -0,0 +1,149 @@
+"""
+Generation tracing - per-run span timelines exported as Chrome trace JSON
+"""
+import asyncio
+import json
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+
+_current_trace: ContextVar["Trace | None"] = ContextVar("trace", default=None)
+_current_span: ContextVar[int | None] = ContextVar("span", default=None)
+
+
+class Trace:
+    """Spans recorded during one run. Each asyncio task gets its own track (tid)."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started_at = datetime.now(timezone.utc).isoformat()
+        self.spans: list[dict] = []
+        self._t0 = time.perf_counter()
+        self._next_id = 0
+        self._lanes: dict[int, int] = {}
+
+    def _lane(self) -> int:
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+        return self._lanes.setdefault(id(task), len(self._lanes) + 1)
+
+    def _new_id(self) -> int:
+        self._next_id += 1
+        return self._next_id
+
+    def to_chrome(self) -> dict:
+        """Chrome trace-event JSON (chrome://tracing, Perfetto, speedscope)."""
+        pid = os.getpid()
+        events = [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": lane,
+             "args": {"name": "main" if lane == 1 else f"task {lane}"}}
+            for lane in sorted(set(self._lanes.values()))
+        ]
+        for s in self.spans:
+            events.append({
+                "name": s["name"],
+                "cat": s["cat"],
+                "ph": "X",
+                "ts": round((s["start"] - self._t0) * 1e6, 1),
+                "dur": round((s["end"] - s["start"]) * 1e6, 1),
+                "pid": pid,
+                "tid": s["lane"],
+                "args": {**s["args"], "span_id": s["id"], "parent_id": s["parent"]},
+            })
+        return {
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+            "otherData": {"name": self.name, "started_at": self.started_at},
+        }
+
+    def save(self, path: Path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.to_chrome(), f, ensure_ascii=False)
+        os.replace(tmp, path)
+        return path
+
+
+@contextmanager
+def activate(trace: Trace | None):
+    """Record spans opened in this context (and tasks started from it) into `trace`."""
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+
+@contextmanager
+def span(name: str, cat: str, **args):
+    """Time a block as a span of the active trace; a no-op when nothing is tracing.
+
+    Yields the span's args dict so the block can attach status, bytes etc.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield args
+        return
+
+    span_id, parent = trace._new_id(), _current_span.get()
+    lane = trace._lane()
+    token = _current_span.set(span_id)
+    start = time.perf_counter()
+    try:
+        yield args
+    except BaseException as e:
+        args["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        end = time.perf_counter()
+        _current_span.reset(token)
+        trace.spans.append({
+            "id": span_id, "parent": parent, "name": name, "cat": cat,
+            "start": start, "end": end, "lane": lane, "args": args,
+        })
+
+
+def critical_path(trace_json: dict) -> list[tuple[int, dict]]:
+    """The chain of spans that determined the run's length, as (depth, event) pairs.
+
+    Within each span, walk back from its end: take the child that finished
+    last, then the child that finished last before that one started, and so
+    on. Those children ran back to back and gated their parent; each is then
+    expanded the same way.
+    """
+    spans = [e for e in trace_json["traceEvents"] if e.get("ph") == "X"]
+    children: dict[int | None, list[dict]] = {}
+    for e in spans:
+        children.setdefault(e["args"].get("parent_id"), []).append(e)
+
+    def end(e: dict) -> float:
+        return e["ts"] + e["dur"]
+
+    def expand(node: dict, depth: int) -> list[tuple[int, dict]]:
+        kids = children.get(node["args"]["span_id"], [])
+        chain, cursor = [], end(node)
+        while True:
+            before = [k for k in kids if end(k) <= cursor and k not in chain]
+            if not before:
+                break
+            last = max(before, key=end)
+            chain.append(last)
+            cursor = last["ts"]
+        path = []
+        for child in reversed(chain):
+            path.append((depth + 1, child))
+            path.extend(expand(child, depth + 1))
+        return path
+
+    roots = children.get(None, [])
+    if not roots:
+        return []
+    root = max(roots, key=lambda e: e["dur"])
+    return [(0, root)] + expand(root, 0)